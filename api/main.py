@@ -1,15 +1,47 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+import asyncio
+import hashlib
+import heapq
+import numbers
+import struct
 import threading
 import time
-from typing import List, Dict, Any, Optional
+import traceback
+import uuid
+import anyio
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
 import sys
 import os
 import json
+import re
 from datetime import datetime
 
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if not ORJSON_AVAILABLE:
+            return super().render(content)
+        return orjson.dumps(
+            content,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -26,7 +58,6 @@ try:
     print("[DATABASE] MongoDB initialized successfully")
 except Exception as e:
     print(f"[DATABASE] MongoDB initialization failed: {e}")
-    import traceback
     traceback.print_exc()
 
 
@@ -35,7 +66,7 @@ except Exception as e:
 # Blockchain logger
 # ---------------------------------------------------------------------------
 try:
-    from blockchain.logger import get_safe_blockchain_logger, MockBlockchainLogger
+    from blockchain.logger import get_safe_blockchain_logger, MockBlockchainLogger, data_upload_event
     blockchain_logger = get_safe_blockchain_logger(strict=False)
     if getattr(blockchain_logger, "is_mock", False) or isinstance(blockchain_logger, MockBlockchainLogger):
         print("[BLOCKCHAIN] Mode: MOCK (no on-chain connectivity)")
@@ -43,14 +74,17 @@ try:
         print("[BLOCKCHAIN] Mode: REAL (connected to blockchain)")
 except Exception as e:
     print(f"[BLOCKCHAIN] Logger import/init failed: {e}")
-    from blockchain.logger import MockBlockchainLogger
+    from blockchain.logger import MockBlockchainLogger, data_upload_event
     blockchain_logger = MockBlockchainLogger()
     print("[BLOCKCHAIN] Mode: MOCK (fallback due to init error)")
 
 # ---------------------------------------------------------------------------
 # FastAPI app
 # ---------------------------------------------------------------------------
-app = FastAPI(title="Federated Drug Trial Eligibility Screener API")
+app = FastAPI(
+    title="Federated Drug Trial Eligibility Screener API",
+    default_response_class=FastJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -81,52 +115,231 @@ async def root():
 # ---------------------------------------------------------------------------
 training_logs: list = []
 is_training: bool = False
+_training_task: Optional[asyncio.Task] = None  # the simulation that owns is_training
+_training_stop: Optional[asyncio.Event] = None  # set to stop the current simulation
 
 # ---------------------------------------------------------------------------
 # Server-side result caches (avoids reloading all patients on every request)
 # ---------------------------------------------------------------------------
-_trials_cache: Dict[str, Any] = {"data": None, "ts": 0}
+def _json_bytes(obj: Any) -> bytes:
+    """Serialize *obj* to JSON bytes once, so cached payloads skip re-encoding."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=str).encode("utf-8")
+
+class SingleFlightTTL:
+    """A TTL cache slot whose refreshes are coalesced (single-flight).
+
+    When the value is stale the first caller rebuilds it while concurrent
+    callers wait on the lock and then reuse the fresh value, so an expiry
+    under load triggers one rebuild instead of one per request.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.value: Any = None
+        self.ts = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self.value is not None and (time.monotonic() - self.ts) < self.ttl
+
+    def invalidate(self) -> None:
+        """Drop the cached value; an in-flight rebuild will not be stored."""
+        self.value = None
+        self.ts = 0.0
+        self._generation += 1
+
+    async def get(self, build):
+        """Return the cached value, awaiting ``build()`` to refresh it if stale."""
+        if self._is_fresh():
+            return self.value
+        async with self._lock:
+            if self._is_fresh():
+                return self.value
+            generation = self._generation
+            value = await build()
+            if generation == self._generation:
+                self.value = value
+                self.ts = time.monotonic()
+            return value
+
+
+def _keyed_slot(slots: "OrderedDict[Any, SingleFlightTTL]", key: Any,
+                ttl: float, max_keys: int) -> SingleFlightTTL:
+    """The cache slot for *key* in an LRU of at most *max_keys* slots.
+
+    For caches keyed by client-supplied values, so arbitrary keys can't grow
+    them without bound.
+    """
+    slot = slots.get(key)
+    if slot is None:
+        slot = slots[key] = SingleFlightTTL(ttl)
+        while len(slots) > max_keys:
+            slots.popitem(last=False)
+    else:
+        slots.move_to_end(key)
+    return slot
+
+
 _TRIALS_CACHE_TTL = 15  # seconds
-_eligibility_cache: Dict[str, Any] = {}  # key = drug_name -> {data, ts}
+_trials_cache = SingleFlightTTL(_TRIALS_CACHE_TTL)
 _ELIGIBILITY_CACHE_TTL = 10  # seconds
+_ELIGIBILITY_CACHE_MAX_KEYS = 64
+# key = drug_name -> trial params; LRU-bounded since drug_name comes from the URL
+_eligibility_cache: "OrderedDict[str, SingleFlightTTL]" = OrderedDict()
+# Trial definitions + disease counts change only on upload / trial creation
+_TRIALS_META_TTL = 60  # seconds
+_trials_meta_cache = SingleFlightTTL(_TRIALS_META_TTL)
+# Per-disease eligibility params, aggregated over all patients in MongoDB
+_TRIAL_PARAMS_TTL = 300  # seconds — invalidated on upload like the meta cache
+_trial_params_cache = SingleFlightTTL(_TRIAL_PARAMS_TTL)
+# Dashboard stats (MongoDB part), key = hospital query param (None = global);
+# LRU-bounded like _eligibility_cache since the key comes from the client
+_STATS_CACHE_TTL = 15  # seconds
+_STATS_CACHE_MAX_KEYS = 64
+_stats_cache: "OrderedDict[Optional[str], SingleFlightTTL]" = OrderedDict()
+
+
+def _etag(body: bytes) -> str:
+    """Weak ETag derived from the response body."""
+    return f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def _conditional_json(request: Request, body: bytes, etag: Optional[str] = None,
+                      headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response with an ETag; 304 when the client already has this body."""
+    etag = etag or _etag(body)
+    headers = {**(headers or {}), "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 # ---------------------------------------------------------------------------
 # Blockchain audit-log throttle  (prevents spamming on repeated page views)
 # ---------------------------------------------------------------------------
-_audit_last_logged: Dict[str, float] = {}   # action -> last epoch
+_audit_last_logged: Dict[str, float] = {}   # action -> last time.monotonic()
 _AUDIT_COOLDOWN = 10  # seconds between duplicate action logs
+# Entries older than this can no longer throttle anything (longest cooldown
+# in use is 15s); they are swept out so per-drug keys don't accumulate.
+_AUDIT_PRUNE_AGE = 10 * _AUDIT_COOLDOWN
+_audit_next_prune = 0.0
+# Guards the throttle map so it stays consistent if called from worker threads
+_audit_throttle_lock = threading.Lock()
+
+def _prune_audit_throttle(now: float) -> None:
+    global _audit_next_prune
+    if now < _audit_next_prune:
+        return
+    _audit_next_prune = now + _AUDIT_PRUNE_AGE
+    cutoff = now - _AUDIT_PRUNE_AGE
+    for action in [a for a, ts in _audit_last_logged.items() if ts < cutoff]:
+        del _audit_last_logged[action]
 
 def _should_log_action(action: str, cooldown: float = _AUDIT_COOLDOWN) -> bool:
     """Return True if enough time has passed since the last log of this action."""
-    now = time.time()
-    last = _audit_last_logged.get(action, 0)
-    if now - last >= cooldown:
-        _audit_last_logged[action] = now
-        return True
-    return False
+    with _audit_throttle_lock:
+        now = time.monotonic()
+        _prune_audit_throttle(now)
+        last = _audit_last_logged.get(action)
+        if last is None or now - last >= cooldown:
+            _audit_last_logged[action] = now
+            return True
+        return False
+
+# Audit events are queued and written in batches by a background task so
+# request handlers never block on blockchain/Mongo I/O.
+_AUDIT_QUEUE_MAX = 10000
+_AUDIT_BATCH_SIZE = 64
+_AUDIT_FLUSH_INTERVAL = 0.25  # seconds to wait for a batch to fill
+_audit_queue: Optional[asyncio.Queue] = None
+_audit_flusher_task: Optional[asyncio.Task] = None
+_audit_dropped = 0
+# Events the flusher had collected but not yet written when it was cancelled
+_audit_unwritten: List[dict] = []
+
+def _write_audit_batch(batch: List[dict]) -> None:
+    """Write queued audit events via the logger (runs in a worker thread)."""
+    try:
+        if hasattr(blockchain_logger, "log_events_batch"):
+            blockchain_logger.log_events_batch(batch)
+        else:
+            for ev in batch:
+                ev = dict(ev)
+                ev.pop("timestamp", None)
+                blockchain_logger.log_event(**ev)
+    except Exception as e:
+        print(f"Failed to write {len(batch)} audit events: {e}")
+
+async def _audit_flusher():
+    """Drain the audit queue in batches of up to _AUDIT_BATCH_SIZE."""
+    loop = asyncio.get_running_loop()
+    batch: List[dict] = []
+    try:
+        while True:
+            batch = [await _audit_queue.get()]
+            deadline = loop.time() + _AUDIT_FLUSH_INTERVAL
+            while len(batch) < _AUDIT_BATCH_SIZE:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_audit_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Hand the batch off before awaiting: a cancel is only delivered
+            # once the thread write finishes, and must not write it again
+            to_write, batch = batch, []
+            await anyio.to_thread.run_sync(_write_audit_batch, to_write)
+    except asyncio.CancelledError:
+        # Shutdown: leave a partially collected batch for flush_audit_queue
+        _audit_unwritten.extend(batch)
+        raise
+
+def _emit_audit(action: str, details: str = "", actor: str = "Unknown Hospital",
+                record_count: int = 0, metadata: dict = None) -> None:
+    """Queue an audit event for the background flusher (no throttling)."""
+    global _audit_dropped
+    if not blockchain_logger or not hasattr(blockchain_logger, 'log_event'):
+        return
+    event = {
+        "action": action, "details": details, "actor": actor,
+        "record_count": record_count, "metadata": metadata,
+        "timestamp": int(time.time()),
+    }
+    if _audit_queue is None:
+        # Flusher not running yet (or already stopped) — write inline
+        _write_audit_batch([event])
+        return
+    try:
+        _audit_queue.put_nowait(event)
+    except asyncio.QueueFull:
+        _audit_dropped += 1
 
 def _log_audit(action: str, details: str = "", actor: str = "Unknown Hospital",
                record_count: int = 0, metadata: dict = None,
                cooldown: float = _AUDIT_COOLDOWN) -> None:
     """Convenience: throttle + fire-and-forget blockchain audit log."""
-    if not blockchain_logger or not hasattr(blockchain_logger, 'log_event'):
-        return
     if not _should_log_action(action, cooldown):
         return
-    try:
-        blockchain_logger.log_event(
-            action=action, details=details, actor=actor,
-            record_count=record_count, metadata=metadata,
-        )
-    except Exception:
-        pass
+    _emit_audit(action, details, actor, record_count, metadata)
 
 # ---------------------------------------------------------------------------
 # Startup event
 # ---------------------------------------------------------------------------
+# Worker threads shared by sync endpoints and anyio.to_thread offloads (CSV
+# parsing, trial estimates, blocking driver calls)
+_THREADPOOL_SIZE = min(32, (os.cpu_count() or 1) * 4)
+
 @app.on_event("startup")
 async def log_startup_event():
     """Log startup to blockchain audit trail and persist in MongoDB."""
+    global _audit_queue, _audit_flusher_task
+    anyio.to_thread.current_default_thread_limiter().total_tokens = _THREADPOOL_SIZE
+    _audit_queue = asyncio.Queue(maxsize=_AUDIT_QUEUE_MAX)
+    _audit_flusher_task = asyncio.create_task(_audit_flusher())
+
     try:
         stats = await db.get_patient_stats()
         patients_count = stats.get("total_patients", 0)
@@ -148,6 +361,31 @@ async def log_startup_event():
     except Exception:
         training_logs = []
 
+
+@app.on_event("shutdown")
+async def flush_audit_queue():
+    """Stop the audit flusher and write any events still queued."""
+    global _audit_queue, _audit_flusher_task
+    if _audit_flusher_task is not None:
+        _audit_flusher_task.cancel()
+        try:
+            await _audit_flusher_task
+        except asyncio.CancelledError:
+            pass
+        _audit_flusher_task = None
+    if _audit_queue is not None:
+        pending = _audit_unwritten[:]
+        _audit_unwritten.clear()
+        while not _audit_queue.empty():
+            pending.append(_audit_queue.get_nowait())
+        _audit_queue = None
+        if pending:
+            await anyio.to_thread.run_sync(_write_audit_batch, pending)
+    if _audit_dropped:
+        print(f"Audit queue dropped {_audit_dropped} events (queue full)")
+    # Entries logged one at a time are buffered in the database module
+    await anyio.to_thread.run_sync(db.flush_audit_logs)
+
 # ---------------------------------------------------------------------------
 # Pydantic models
 # ---------------------------------------------------------------------------
@@ -235,11 +473,14 @@ async def log_activity(entry: ActivityLog):
     )
     return {"ok": True}
 
-@app.get("/health")
-async def health_check():
+_HEALTH_CACHE_TTL = 2       # seconds — absorbs orchestrator probe storms
+_HEALTH_PING_TIMEOUT = 0.5  # seconds — a hung MongoDB must not wedge probes
+_health_cache = SingleFlightTTL(_HEALTH_CACHE_TTL)
+
+async def _check_connectivity() -> Dict[str, bool]:
     mongo_connected = False
     try:
-        await db.get_async_db().command("ping")
+        await asyncio.wait_for(db.get_async_db().command("ping"), timeout=_HEALTH_PING_TIMEOUT)
         mongo_connected = True
     except Exception:
         pass
@@ -247,63 +488,63 @@ async def health_check():
     blockchain_connected = False
     try:
         if blockchain_logger and hasattr(blockchain_logger, 'w3') and blockchain_logger.w3:
-            blockchain_connected = blockchain_logger.w3.is_connected()
+            # Web3 RPC call is synchronous — run it in a worker thread
+            blockchain_connected = await anyio.to_thread.run_sync(blockchain_logger.w3.is_connected)
     except Exception:
         pass
 
     return {
-        "status": "healthy",
         "blockchain_connected": blockchain_connected,
         "mongodb_connected": mongo_connected,
+    }
+
+@app.get("/health")
+async def health_check():
+    connectivity = await _health_cache.get(_check_connectivity)
+    return {
+        "status": "healthy",
+        **connectivity,
         "training_active": is_training
     }
 
 # ---------------------------------------------------------------------------
 # Blockchain audit logs — served from MongoDB (with response caching)
 # ---------------------------------------------------------------------------
-_blockchain_logs_cache: Dict[str, Any] = {"data": None, "ts": 0}
 _BLOCKCHAIN_CACHE_TTL = 2  # seconds — avoids hitting MongoDB on every poll
+_blockchain_logs_cache = SingleFlightTTL(_BLOCKCHAIN_CACHE_TTL)
 
-@app.get("/blockchain-logs")
-async def get_blockchain_logs():
-    """Return audit trail — merge MongoDB and in-memory mock logger."""
-    now = time.time()
-    if _blockchain_logs_cache["data"] and (now - _blockchain_logs_cache["ts"]) < _BLOCKCHAIN_CACHE_TTL:
-        return JSONResponse(
-            content=_blockchain_logs_cache["data"],
-            headers={"Cache-Control": "no-cache, no-store, must-revalidate"},
-        )
-
-    all_logs = []
+async def _build_blockchain_logs() -> bytes:
+    """Merge MongoDB and in-memory mock logger audit trails, newest first."""
+    # Merge keyed by txHash so duplicates collapse to a single entry
+    by_hash: Dict[Any, dict] = {}
 
     # 1) Try MongoDB
     try:
         mongo_logs = await db.get_audit_logs(limit=500)
-        all_logs.extend(mongo_logs)
+        by_hash.update((l.get("txHash") or id(l), l) for l in mongo_logs)
     except Exception as e:
         print(f"[BLOCKCHAIN] Error getting audit logs from MongoDB: {e}")
 
     # 2) Also grab from in-memory mock logger (may have entries that failed MongoDB write)
     if blockchain_logger and hasattr(blockchain_logger, 'get_audit_logs'):
         try:
-            mock_logs = blockchain_logger.get_audit_logs()
-            existing_hashes = {l.get("txHash") for l in all_logs if l.get("txHash")}
-            for log in mock_logs:
-                if log.get("txHash") not in existing_hashes:
-                    all_logs.append(log)
-                    existing_hashes.add(log.get("txHash"))
+            for log in blockchain_logger.get_audit_logs():
+                by_hash.setdefault(log.get("txHash") or id(log), log)
         except Exception:
             pass
 
-    # Sort newest first
-    all_logs.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
+    # Newest first — only the top 500 are returned, so avoid a full sort
+    newest = heapq.nlargest(500, by_hash.values(), key=lambda x: x.get("timestamp", 0))
 
-    payload = {"logs": all_logs[:500], "total": len(all_logs)}
-    _blockchain_logs_cache["data"] = payload
-    _blockchain_logs_cache["ts"] = now
+    return _json_bytes({"logs": newest, "total": len(by_hash)})
 
-    return JSONResponse(
-        content=payload,
+@app.get("/blockchain-logs")
+async def get_blockchain_logs():
+    """Return audit trail — merge MongoDB and in-memory mock logger."""
+    body = await _blockchain_logs_cache.get(_build_blockchain_logs)
+    return Response(
+        content=body,
+        media_type="application/json",
         headers={"Cache-Control": "no-cache, no-store, must-revalidate"},
     )
 
@@ -311,7 +552,7 @@ async def get_blockchain_logs():
 # Patient endpoints — powered by MongoDB
 # ---------------------------------------------------------------------------
 # Internal/ML fields hidden from ALL views
-_INTERNAL_COLUMNS = {"eligible", "drug_worked", "drug", "hospital_name"}
+_INTERNAL_COLUMNS = frozenset({"eligible", "drug_worked", "drug", "hospital_name"})
 
 # Personal / identifying fields — shown only in the Patients tab (own hospital)
 _PERSONAL_COLUMNS = [
@@ -327,22 +568,43 @@ _PATIENT_VIEW_COLUMNS = [
 ]
 
 # Columns for federated / trials view — privacy-preserving (NO personal info)
-_FEDERATED_COLUMNS = [
+_FEDERATED_COLUMNS = (
     "patient_id", "age", "gender", "blood_group", "disease",
     "stage", "comorbidities", "bmi", "diagnosis_date",
-]
+)
+# Federated row fields copied as-is (patient_id is replaced by ANON-xxxxx)
+_FEDERATED_ROW_COLUMNS = tuple(c for c in _FEDERATED_COLUMNS if c != "patient_id")
+# Columns for hospital-scoped eligibility pages (own patients, names shown)
+_HOSPITAL_SCREEN_COLUMNS = (
+    "patient_id", "patient_name", "age", "gender", "blood_group",
+    "disease", "stage", "comorbidities", "bmi", "diagnosis_date",
+)
+# Mongo projection for federated pages — personal fields never leave the DB
+_FEDERATED_PROJECTION = {"_id": 0, **{c: 1 for c in _FEDERATED_COLUMNS}}
+
+# Fields needed to derive trial eligibility params
+_ELIGIBILITY_FIELDS = {
+    "_id": 0, "age": 1, "gender": 1, "blood_group": 1, "bmi": 1,
+    "stage": 1, "disease": 1, "comorbidities": 1,
+}
+
+async def _load_stats(hospital: Optional[str]) -> Tuple[dict, List[dict], Dict[str, int]]:
+    return await asyncio.gather(
+        db.get_patient_stats(hospital_name=hospital),
+        db.get_trials_from_db(),
+        db.get_hospital_patient_counts(),
+    )
 
 @app.get("/stats")
-async def get_stats(hospital: Optional[str] = None):
+async def get_stats(request: Request, hospital: Optional[str] = None):
     """Fast lightweight stats from MongoDB aggregation.
 
     If *hospital* is provided, patient counts are scoped to that hospital.
     Global (federated) totals are always included for context.
     """
     try:
-        stats = await db.get_patient_stats(hospital_name=hospital)
-        trials = await db.get_trials_from_db()
-        hospital_counts = await db.get_hospital_patient_counts()
+        cache = _keyed_slot(_stats_cache, hospital, _STATS_CACHE_TTL, _STATS_CACHE_MAX_KEYS)
+        stats, trials, hospital_counts = await cache.get(lambda: _load_stats(hospital))
 
         _log_audit(
             action="DASHBOARD_VIEWED",
@@ -351,7 +613,7 @@ async def get_stats(hospital: Optional[str] = None):
             record_count=stats.get("total_patients", 0),
         )
 
-        return {
+        return _conditional_json(request, _json_bytes({
             "total_patients": stats.get("total_patients", 0),
             "global_total_patients": stats.get("global_total_patients", 0),
             "total_trials": sum(1 for t in trials if t.get("status", "").lower() == "active"),
@@ -363,7 +625,7 @@ async def get_stats(hospital: Optional[str] = None):
             "rounds_completed": len(training_logs),
             "latest_accuracy": round(training_logs[-1]["accuracy"] * 100, 1) if training_logs else None,
             "hospital_patient_counts": hospital_counts,
-        }
+        }))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -372,8 +634,9 @@ async def get_stats(hospital: Optional[str] = None):
 async def get_stats_hospitals():
     """Return list of hospitals with patient counts."""
     try:
-        hospitals = await db.get_hospitals()
-        hospital_counts = await db.get_hospital_patient_counts()
+        hospitals, hospital_counts = await asyncio.gather(
+            db.get_hospitals(), db.get_hospital_patient_counts(),
+        )
         result = []
         for h in hospitals:
             hname = h.get("hospital_name", h.get("username", "Unknown"))
@@ -389,15 +652,18 @@ async def get_stats_hospitals():
 
 
 @app.get("/stats/diseases")
-async def get_stats_diseases():
+async def get_stats_diseases(request: Request):
     """Return disease breakdown with patient counts."""
     try:
-        disease_counts = await db.get_disease_counts()
+        # Counts arrive most-common-first; reuse the cached trials meta copy
+        meta = await _get_trials_meta()
         diseases = [
             {"name": name, "count": count}
-            for name, count in sorted(disease_counts.items(), key=lambda x: x[1], reverse=True)
+            for name, count in meta["disease_counts"].items()
         ]
-        return {"diseases": diseases, "total": sum(d["count"] for d in diseases)}
+        return _conditional_json(request, _json_bytes(
+            {"diseases": diseases, "total": sum(d["count"] for d in diseases)}
+        ))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -424,7 +690,7 @@ async def get_patients(
                     hosp_count = await db.count_patients_for_hospital(hospital)
                 else:
                     hosp_count = await db.count_patients()
-                blockchain_logger.log_event(
+                _emit_audit(
                     action="PATIENTS_VIEWED",
                     details=f"Patient records accessed by {hospital or 'Unknown Hospital'} — {hosp_count} hospital records (page {page})",
                     actor=hospital or "Unknown Hospital",
@@ -441,139 +707,207 @@ async def get_patients(
             sort_dir=sort_dir,
             hospital_name=hospital,   # <-- scope to this hospital
         )
-        return result
+        # Returned as a response so FastAPI skips jsonable_encoder on the rows
+        return FastJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # ---------------------------------------------------------------------------
 # Eligibility helpers
 # ---------------------------------------------------------------------------
-def _compute_eligibility(patient: dict, trial_params: dict) -> bool:
-    age = patient.get("age")
-    if age is not None and trial_params.get("ageRange"):
-        lo, hi = trial_params["ageRange"]
-        if not (lo <= age <= hi):
-            return False
+# Fields screened against trial params, and the param key for each
+_SCREEN_RANGES = (("age", "ageRange"), ("bmi", "bmiRange"))
+_SCREEN_CATEGORIES = (("gender", "genders"), ("blood_group", "bloodGroups"), ("stage", "stages"))
 
-    gender = patient.get("gender", "")
-    allowed_genders = trial_params.get("genders", [])
-    if allowed_genders and gender and gender not in allowed_genders:
-        return False
 
-    bg = patient.get("blood_group", "")
-    allowed_bg = trial_params.get("bloodGroups", [])
-    if allowed_bg and bg and bg not in allowed_bg:
-        return False
+def _is_real_number(value: Any) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
 
-    bmi = patient.get("bmi")
-    if bmi is not None and trial_params.get("bmiRange"):
-        lo, hi = trial_params["bmiRange"]
-        if not (lo <= bmi <= hi):
-            return False
 
-    stage = patient.get("stage", "")
-    allowed_stages = trial_params.get("stages", [])
-    if allowed_stages and stage and stage not in allowed_stages:
-        return False
+def _range_column(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Float values plus a missing mask for one range field.
+
+    Follows db.build_eligibility_filter: $gte/$lte only match numbers, so a
+    stored non-number ("", "abc", even "61") is NaN and fails the range,
+    while a missing (None/absent) value is flagged and passes it.
+    """
+    missing = values.isna().to_numpy()
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        values = values.where(values.map(_is_real_number))
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64), missing
+
+
+def _screen_arrays(patients: List[dict]) -> Dict[str, Any]:
+    """Columnar NumPy view of the screened fields, built once per sample.
 
-    return True
-
-
-def _build_trial_params_for_disease(all_patients, disease):
-    ages, bmis, genders, blood_groups, stages, comorbidities = [], [], set(), set(), set(), []
-    for p in all_patients:
-        if p.get("disease", "") == disease:
-            a = p.get("age")
-            if a is not None: ages.append(a)
-            g = p.get("gender")
-            if g: genders.add(g)
-            bg = p.get("blood_group")
-            if bg: blood_groups.add(bg)
-            b = p.get("bmi")
-            if b is not None: bmis.append(b)
-            s = p.get("stage")
-            if s: stages.add(s)
-            c = p.get("comorbidities", [])
-            if isinstance(c, list):
-                comorbidities.extend(c)
-    comorbidity_counts = {}
-    for c in comorbidities:
-        comorbidity_counts[c] = comorbidity_counts.get(c, 0) + 1
-    top_comorbidities = sorted(comorbidity_counts, key=comorbidity_counts.get, reverse=True)[:5]
+    Range fields become (float values, missing mask) pairs via _range_column.
+    Categorical fields become integer codes plus their distinct values and
+    a mask of missing/empty entries, so each trial screens with np.isin on
+    small ints instead of comparing strings.
+    """
+    columns = [col for col, _ in _SCREEN_RANGES + _SCREEN_CATEGORIES]
+    df = pd.DataFrame.from_records(patients, columns=columns)
+    arrays: Dict[str, Any] = {"n": len(df)}
+    for col, _ in _SCREEN_RANGES:
+        arrays[col] = _range_column(df[col])
+    for col, _ in _SCREEN_CATEGORIES:
+        codes, uniques = pd.factorize(df[col])
+        uniques = pd.Index(uniques)
+        blank = (codes == -1) | np.isin(codes, np.flatnonzero(uniques == ""))
+        arrays[col] = (codes, uniques, blank)
+    return arrays
+
+
+def _distinct_list(values: Optional[list]) -> list:
+    """Sorted distinct non-empty values from a Mongo $addToSet list."""
+    return sorted({v for v in values or () if v is not None and v != ""}, key=str)
+
+
+def _trial_params_from_stats(stats: Optional[dict]) -> dict:
+    """Eligibility params from one disease's db.get_trial_params_by_disease() entry."""
+    stats = stats or {}
+    genders = _distinct_list(stats.get("genders"))
+    has_age = stats.get("min_age") is not None
+    has_bmi = stats.get("min_bmi") is not None
     return {
-        "ageRange": [min(ages), max(ages)] if ages else [18, 85],
-        "genders": sorted(genders) if genders else ["Male", "Female"],
-        "bloodGroups": sorted(blood_groups) if blood_groups else [],
-        "bmiRange": [round(min(bmis), 1), round(max(bmis), 1)] if bmis else [15.0, 40.0],
-        "stages": sorted(stages) if stages else [],
-        "commonComorbidities": top_comorbidities,
+        "ageRange": [stats["min_age"], stats["max_age"]] if has_age else [18, 85],
+        "genders": genders if genders else ["Male", "Female"],
+        "bloodGroups": _distinct_list(stats.get("blood_groups")),
+        "bmiRange": [round(stats["min_bmi"], 1), round(stats["max_bmi"], 1)] if has_bmi else [15.0, 40.0],
+        "stages": _distinct_list(stats.get("stages")),
+        "commonComorbidities": list(stats.get("top_comorbidities") or []),
     }
 
+
+async def _load_trial_params() -> Dict[str, dict]:
+    stats = await db.get_trial_params_by_disease()
+    return {disease: _trial_params_from_stats(s) for disease, s in stats.items()}
+
+
+async def _get_trial_params(disease: str) -> dict:
+    """Eligibility params for *disease*, from the cached per-disease aggregate."""
+    params_by_disease = await _trial_params_cache.get(_load_trial_params)
+    return params_by_disease.get(disease) or _trial_params_from_stats(None)
+
+
+def _eligibility_mask(arrays: Dict[str, Any], trial_params: dict) -> np.ndarray:
+    """Vectorized eligibility check over _screen_arrays() output.
+
+    Same rule as db.build_eligibility_filter: a missing value never excludes
+    a patient from a criterion (nor does an empty categorical one), but a
+    non-numeric age or BMI fails its range.
+    """
+    mask = np.ones(arrays["n"], dtype=bool)
+    for col, key in _SCREEN_RANGES:
+        if trial_params.get(key):
+            lo, hi = trial_params[key]
+            values, missing = arrays[col]
+            mask &= missing | ((values >= lo) & (values <= hi))
+    for col, key in _SCREEN_CATEGORIES:
+        allowed = trial_params.get(key, [])
+        if allowed:
+            codes, uniques, blank = arrays[col]
+            mask &= blank | np.isin(codes, np.flatnonzero(uniques.isin(allowed)))
+    return mask
+
+
+def _estimate_trials(trial_defs: List[dict], sample: List[dict],
+                     disease_counts: Dict[str, int], total_patients: int,
+                     params_by_disease: Dict[str, dict]) -> List[dict]:
+    """Build the trial list with sample-based eligibility estimates (CPU-bound)."""
+    sample_len = len(sample)
+    sample_arrays = _screen_arrays(sample)
+    trials = []
+    for idx, tdef in enumerate(trial_defs):
+        disease = tdef["indication"]
+        enrolled = disease_counts.get(disease, 0)
+
+        elig_params = params_by_disease.get(disease) or _trial_params_from_stats(None)
+
+        sample_eligible = int(_eligibility_mask(sample_arrays, elig_params).sum())
+        estimated_eligible = round(sample_eligible * total_patients / sample_len) if sample_len > 0 else 0
+
+        trials.append({
+            "id": idx + 1,
+            "drugName": tdef["drugName"],
+            "indication": disease,
+            "phase": tdef.get("phase", "Phase III"),
+            "status": tdef.get("status", "Active"),
+            "patientsEnrolled": enrolled,
+            "successRate": tdef.get("successRate", 0),
+            "startDate": "2025-01-15",
+            "lastUpdate": datetime.now().strftime("%Y-%m-%d"),
+            "eligibilityParams": elig_params,
+            "eligibleFromCurrent": estimated_eligible,
+            "sourceHospitalCount": 3,
+        })
+    return trials
+
 # ---------------------------------------------------------------------------
 def _invalidate_trials_cache():
     """Call after data changes (upload) to force re-computation."""
-    _trials_cache["data"] = None
-    _trials_cache["ts"] = 0
+    _trials_meta_cache.invalidate()
+    _trial_params_cache.invalidate()
+    _trials_cache.invalidate()
     _eligibility_cache.clear()
+    _stats_cache.clear()
+
+async def _load_trials_meta() -> Dict[str, Any]:
+    trial_defs, disease_counts, total_patients = await asyncio.gather(
+        db.get_trials_from_db(), db.get_disease_counts(), db.count_patients(),
+    )
+    return {
+        "trials": trial_defs,
+        "disease_counts": disease_counts,
+        "total": total_patients,
+        "disease_map": {t["drugName"]: t["indication"] for t in trial_defs},
+    }
+
+async def _get_trials_meta() -> Dict[str, Any]:
+    """Trial definitions, disease counts and patient total (cached, shared)."""
+    return await _trials_meta_cache.get(_load_trials_meta)
 
 # Trials endpoints — definitions from MongoDB
 # ---------------------------------------------------------------------------
-@app.get("/trials")
-async def get_trials(hospital: Optional[str] = None):
-    """Return drug trials from MongoDB with eligibility estimates (cached)."""
-    import random as _rand
+async def _build_trials(hospital: Optional[str]) -> bytes:
+    meta = await _get_trials_meta()
+    total_patients = meta["total"]
+    disease_counts = meta["disease_counts"]
+    trial_defs = meta["trials"]
+
+    # Use a small sample for estimated eligibility (avoids loading ALL patients)
+    SAMPLE_SIZE = 2000
+    sample, params_by_disease = await asyncio.gather(
+        db.get_patient_sample(SAMPLE_SIZE, projection=_ELIGIBILITY_FIELDS),
+        _trial_params_cache.get(_load_trial_params),
+    )
 
-    now = time.time()
-    if _trials_cache["data"] and (now - _trials_cache["ts"]) < _TRIALS_CACHE_TTL:
-        return _trials_cache["data"]
+    # Per-trial estimation is pure Python — keep it off the event loop
+    trials = await anyio.to_thread.run_sync(
+        _estimate_trials, trial_defs, sample, disease_counts, total_patients, params_by_disease,
+    )
 
-    try:
-        total_patients = await db.count_patients()
-        disease_counts = await db.get_disease_counts()
-        trial_defs = await db.get_trials_from_db()
-
-        # Use a small sample for estimated eligibility (avoids loading ALL patients)
-        SAMPLE_SIZE = 2000
-        sample = await db.get_patient_sample(SAMPLE_SIZE)
-        sample_len = len(sample)
-
-        trials = []
-        for idx, tdef in enumerate(trial_defs):
-            disease = tdef["indication"]
-            enrolled = disease_counts.get(disease, 0)
-
-            elig_params = _build_trial_params_for_disease(sample, disease)
-
-            sample_eligible = sum(1 for p in sample if _compute_eligibility(p, elig_params))
-            estimated_eligible = round(sample_eligible * total_patients / sample_len) if sample_len > 0 else 0
-
-            trials.append({
-                "id": idx + 1,
-                "drugName": tdef["drugName"],
-                "indication": disease,
-                "phase": tdef.get("phase", "Phase III"),
-                "status": tdef.get("status", "Active"),
-                "patientsEnrolled": enrolled,
-                "successRate": tdef.get("successRate", 0),
-                "startDate": "2025-01-15",
-                "lastUpdate": datetime.now().strftime("%Y-%m-%d"),
-                "eligibilityParams": elig_params,
-                "eligibleFromCurrent": estimated_eligible,
-                "sourceHospitalCount": 3,
-            })
+    # Log trials view to blockchain audit trail (throttled)
+    _log_audit(
+        action="TRIALS_VIEWED",
+        details=f"Clinical trials accessed by {hospital or 'Unknown Hospital'} ({len(trials)} trials listed)",
+        actor=hospital or "Unknown Hospital",
+        record_count=len(trials),
+    )
 
-        # Log trials view to blockchain audit trail (throttled)
-        _log_audit(
-            action="TRIALS_VIEWED",
-            details=f"Clinical trials accessed by {hospital or 'Unknown Hospital'} ({len(trials)} trials listed)",
-            actor=hospital or "Unknown Hospital",
-            record_count=len(trials),
-        )
+    return _json_bytes({"trials": trials})
 
-        result = {"trials": trials}
-        _trials_cache["data"] = result
-        _trials_cache["ts"] = now
-        return result
+
+@app.get("/trials")
+async def get_trials(request: Request, hospital: Optional[str] = None):
+    """Return drug trials from MongoDB with eligibility estimates (cached)."""
+    async def build() -> Tuple[bytes, str]:
+        body = await _build_trials(hospital)
+        return body, _etag(body)
+
+    try:
+        body, etag = await _trials_cache.get(build)
+        return _conditional_json(request, body, etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -609,6 +943,15 @@ async def create_trial(req: CreateTrialRequest, hospital: Optional[str] = None):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _build_trial_screen(drug_name: str) -> Tuple[dict, dict]:
+    """Trial params for *drug_name* plus the Mongo filter derived from them."""
+    meta = await _get_trials_meta()
+    disease = meta["disease_map"].get(drug_name, drug_name)
+
+    trial_params = await _get_trial_params(disease)
+    return trial_params, db.build_eligibility_filter(trial_params)
+
+
 @app.get("/trials/{drug_name}/eligible")
 async def get_eligible_patients_for_drug(
     drug_name: str,
@@ -624,57 +967,47 @@ async def get_eligible_patients_for_drug(
         page_size = min(max(page_size, 10), 200)
         page = max(page, 1)
 
-        # Only fetch the fields needed for eligibility computation
-        all_p = await db.get_all_patients_for_eligibility()
-
-        # Build trial disease map from DB
-        trial_defs = await db.get_trials_from_db()
-        trial_disease_map = {t["drugName"]: t["indication"] for t in trial_defs}
-        disease = trial_disease_map.get(drug_name, drug_name)
-        trial_params = _build_trial_params_for_disease(all_p, disease)
-
-        eligible_ids = []
-        not_eligible_ids = []
-        # Also track hospital-specific eligibility
-        hospital_eligible_count = 0
-        hospital_not_eligible_count = 0
-        hospital_total = 0
-        # Track per-hospital breakdown
-        hospital_breakdown = {}
-        for i, patient in enumerate(all_p):
-            is_elig = _compute_eligibility(patient, trial_params)
-            if is_elig:
-                eligible_ids.append(i)
-            else:
-                not_eligible_ids.append(i)
-            # Count hospital-specific numbers
-            if hospital and patient.get("hospital_name") == hospital:
-                hospital_total += 1
-                if is_elig:
-                    hospital_eligible_count += 1
-                else:
-                    hospital_not_eligible_count += 1
-            # Per-hospital breakdown
-            h_name = patient.get("hospital_name", "Unknown")
-            if h_name not in hospital_breakdown:
-                hospital_breakdown[h_name] = {"eligible": 0, "not_eligible": 0, "total": 0}
-            hospital_breakdown[h_name]["total"] += 1
-            if is_elig:
-                hospital_breakdown[h_name]["eligible"] += 1
-            else:
-                hospital_breakdown[h_name]["not_eligible"] += 1
-
-        eligible_count = len(eligible_ids)
-        not_eligible_count = len(not_eligible_ids)
+        cache = _keyed_slot(_eligibility_cache, drug_name, _ELIGIBILITY_CACHE_TTL, _ELIGIBILITY_CACHE_MAX_KEYS)
+        trial_params, elig_filter = await cache.get(lambda: _build_trial_screen(drug_name))
+
+        requested_scope = (scope or "global").strip().lower()
+        hospital_scope = requested_scope == "hospital" and bool(hospital)
+        search_term = (search or "").strip().lower()
+        # Search is intentionally supported only for hospital-scoped list views
+        search_active = hospital_scope and bool(search_term)
+
+        start = (page - 1) * page_size
+
+        # Eligibility predicate, search, counts and the requested page all run inside MongoDB
+        page_filter = elig_filter if tab == "eligible" else {"$nor": [elig_filter]}
+        if hospital_scope:
+            page_filter = {"$and": [page_filter, {"hospital_name": hospital}]}
+            if search_active:
+                page_filter["$and"].append(db.build_screen_search_filter(search_term))
+        screen = await db.get_eligibility_screen(
+            elig_filter,
+            page_filter,
+            skip=start,
+            limit=page_size,
+            projection=None if hospital_scope else _FEDERATED_PROJECTION,
+        )
+
+        hospital_breakdown = screen["hospital_breakdown"]
+        eligible_count = sum(h["eligible"] for h in hospital_breakdown.values())
+        not_eligible_count = sum(h["not_eligible"] for h in hospital_breakdown.values())
+        own = hospital_breakdown.get(hospital, {}) if hospital else {}
+        hospital_eligible_count = own.get("eligible", 0)
+        hospital_not_eligible_count = own.get("not_eligible", 0)
+        hospital_total = own.get("total", 0)
 
         # Log eligibility check (throttled per drug)
         elig_action_key = f"ELIGIBILITY_SCREEN_{drug_name}"
         if _should_log_action(elig_action_key):
             try:
                 hosp_detail = f" | {hospital}: {hospital_eligible_count} eligible out of {hospital_total}" if hospital else ""
-                blockchain_logger.log_event(
+                _emit_audit(
                     action="ELIGIBILITY_SCREEN",
-                    details=f"{drug_name}: {eligible_count} eligible, {not_eligible_count} not eligible out of {len(all_p)} patients (federated){hosp_detail}",
+                    details=f"{drug_name}: {eligible_count} eligible, {not_eligible_count} not eligible out of {eligible_count + not_eligible_count} patients (federated){hosp_detail}",
                     actor=hospital or "Unknown Hospital",
                     record_count=eligible_count + not_eligible_count,
                     metadata={"drug": drug_name, "eligible": eligible_count, "not_eligible": not_eligible_count,
@@ -684,92 +1017,33 @@ async def get_eligible_patients_for_drug(
             except Exception:
                 pass
 
-        requested_scope = (scope or "global").strip().lower()
-        hospital_scope = requested_scope == "hospital" and bool(hospital)
-        search_term = (search or "").strip().lower()
+        page_patients_raw = screen["patients"]
+        total_for_tab = screen["page_total"]
 
-        if tab == "eligible":
-            scoped_ids = eligible_ids
-            total_for_tab = eligible_count
-            if hospital_scope:
-                scoped_ids = [idx for idx in eligible_ids if all_p[idx].get("hospital_name") == hospital]
-                total_for_tab = hospital_eligible_count
-        else:
-            scoped_ids = not_eligible_ids
-            total_for_tab = not_eligible_count
-            if hospital_scope:
-                scoped_ids = [idx for idx in not_eligible_ids if all_p[idx].get("hospital_name") == hospital]
-                total_for_tab = hospital_not_eligible_count
-
-        # Search is intentionally supported only for hospital-scoped list views
-        if hospital_scope and search_term:
-            def _normalize_stage(value: Any) -> str:
-                txt = str(value or "").strip().upper()
-                if txt.startswith("STAGE "):
-                    txt = txt.replace("STAGE ", "", 1).strip()
-                return txt
-
-            stage_query = _normalize_stage(search_term)
-            is_stage_exact_query = stage_query in {"I", "II", "III", "IV", "V"}
-
-            def _matches_search(p: dict) -> bool:
-                if is_stage_exact_query:
-                    return _normalize_stage(p.get("stage")) == stage_query
-
-                fields = [
-                    str(p.get("patient_id", "")),
-                    str(p.get("patient_name", "")),
-                    str(p.get("name", "")),
-                    str(p.get("disease", "")),
-                    str(p.get("stage", "")),
-                    str(p.get("blood_group", "")),
-                    str(p.get("gender", "")),
-                    str(p.get("age", "")),
-                    str(p.get("bmi", "")),
-                ]
-                comorb = p.get("comorbidities", [])
-                if isinstance(comorb, list):
-                    fields.extend(str(x) for x in comorb)
-                else:
-                    fields.append(str(comorb))
-                blob = " ".join(fields).lower()
-                return search_term in blob
-
-            scoped_ids = [idx for idx in scoped_ids if _matches_search(all_p[idx])]
-            total_for_tab = len(scoped_ids)
-
-        start = (page - 1) * page_size
-        end = start + page_size
-        page_ids = scoped_ids[start:end]
-
-        page_patients_raw = [all_p[i] for i in page_ids]
-        total_pages = max(1, -(-total_for_tab // page_size))
+        total_pages = max(1, (total_for_tab + page_size - 1) // page_size)
 
+        present = set().union(*(p.keys() for p in page_patients_raw[:5]))
         if hospital_scope:
-            hospital_cols = [
-                "patient_id", "patient_name", "age", "gender", "blood_group",
-                "disease", "stage", "comorbidities", "bmi", "diagnosis_date",
-            ]
-            cols = [c for c in hospital_cols if any(c in p for p in page_patients_raw[:5])]
+            cols = [c for c in _HOSPITAL_SCREEN_COLUMNS if c in present]
             if "patient_name" not in cols:
                 cols.insert(1, "patient_name")
             page_patients = []
             for p in page_patients_raw:
-                row = {k: p.get(k) for k in cols}
-                if "patient_name" in row:
-                    row["patient_name"] = row.get("patient_name") or p.get("name") or "-"
+                row = dict(zip(cols, map(p.get, cols)))
+                row["patient_name"] = row["patient_name"] or p.get("name") or "-"
                 page_patients.append(row)
         else:
-            cols = [c for c in _FEDERATED_COLUMNS if any(c in p for p in page_patients_raw[:5])]
+            cols = [c for c in _FEDERATED_COLUMNS if c in present]
+            row_cols = tuple(c for c in _FEDERATED_ROW_COLUMNS if c in present)
             # Privacy-preserving: only medical/demographic fields, anonymize patient IDs
             page_patients = []
             for idx, p in enumerate(page_patients_raw):
-                row = {k: p.get(k) for k in cols if k != "patient_id"}
+                row = dict(zip(row_cols, map(p.get, row_cols)))
                 # Replace real patient_id with anonymous identifier
                 row["patient_id"] = f"ANON-{start + idx + 1:05d}"
                 page_patients.append(row)
 
-        return {
+        return FastJSONResponse({
             "drug": drug_name,
             "hospital": hospital,
             "tab": tab,
@@ -790,7 +1064,7 @@ async def get_eligible_patients_for_drug(
             "trial_params": trial_params,
             "privacy_mode": True,
             "privacy_notice": "Patient identities are anonymized. Only medical and demographic data is shared for trial eligibility screening.",
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -807,16 +1081,88 @@ except ImportError:
 UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
 CSV_ARCHIVE_DIR = os.path.join(UPLOAD_DIR, "csv_archive")
 
-_upload_progress: Dict[str, Dict] = {}
+# upload_id -> (percent, stage), oldest first; bounded so finished or
+# abandoned uploads don't accumulate
+_UPLOAD_PROGRESS_MAX = 512
+_upload_progress: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+_UPLOAD_WAITING = (0, "waiting")
+# Client-chosen upload ids: hex, as generated server-side (uuid4().hex[:12])
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{12,32}$")
+# upload_id -> Event set (and replaced) on every progress change
+_upload_events: Dict[str, asyncio.Event] = {}
+_UPLOAD_STREAM_KEEPALIVE = 15  # seconds between SSE keep-alive comments
+
+def _check_upload_id(upload_id: str) -> None:
+    if not _UPLOAD_ID_RE.match(upload_id):
+        raise HTTPException(status_code=400, detail="upload_id must be 12-32 lowercase hex characters")
+
+def _set_upload_progress(upload_id: str, percent: int, stage: str) -> None:
+    """Record upload progress and wake any SSE subscribers."""
+    _upload_progress[upload_id] = (percent, stage)
+    _upload_progress.move_to_end(upload_id)
+    while len(_upload_progress) > _UPLOAD_PROGRESS_MAX:
+        evicted, _ = _upload_progress.popitem(last=False)
+        stale = _upload_events.pop(evicted, None)
+        if stale is not None:
+            stale.set()
+    old = _upload_events.get(upload_id)
+    if percent >= 100 or percent < 0:
+        _upload_events.pop(upload_id, None)
+    else:
+        _upload_events[upload_id] = asyncio.Event()
+    if old is not None:
+        old.set()
 
 @app.get("/upload-progress/{upload_id}")
 async def get_upload_progress(upload_id: str):
-    return _upload_progress.get(upload_id, {"percent": 0, "stage": "waiting"})
+    percent, stage = _upload_progress.get(upload_id, _UPLOAD_WAITING)
+    return {"percent": percent, "stage": stage}
+
+@app.get("/upload-progress/{upload_id}/stream")
+async def stream_upload_progress(upload_id: str, request: Request):
+    """Server-Sent Events feed of upload progress — one message per stage change.
+
+    May be opened before the upload starts; the id is then registered as
+    waiting, in the same bounded map as running uploads.
+    """
+    _check_upload_id(upload_id)
+    if upload_id not in _upload_progress:
+        _set_upload_progress(upload_id, *_UPLOAD_WAITING)
+
+    async def gen():
+        while True:
+            state = _upload_progress.get(upload_id)
+            ev = _upload_events.get(upload_id)
+            if state is None:
+                return  # evicted from the bounded progress map
+            percent, stage = state
+            yield f"data: {json.dumps({'percent': percent, 'stage': stage})}\n\n"
+            if percent >= 100 or percent < 0 or ev is None:
+                return
+            while True:
+                try:
+                    await asyncio.wait_for(ev.wait(), _UPLOAD_STREAM_KEEPALIVE)
+                    break
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/upload")
-async def upload_file(file: UploadFile = File(...), hospital: Optional[str] = None):
-    """Unified upload — preprocess, store in MongoDB, regenerate training CSV."""
+async def upload_file(file: UploadFile = File(...), hospital: Optional[str] = None,
+                      upload_id: Optional[str] = None):
+    """Unified upload — preprocess, store in MongoDB, regenerate training CSV.
+
+    Clients may pass their own *upload_id* to subscribe to
+    ``/upload-progress/{upload_id}/stream`` before the upload finishes.
+    """
     if not PREPROCESSING_AVAILABLE:
         raise HTTPException(status_code=500, detail="Preprocessing module not available")
 
@@ -824,23 +1170,30 @@ async def upload_file(file: UploadFile = File(...), hospital: Optional[str] = No
     if ext not in (".csv", ".json", ".pdf"):
         raise HTTPException(status_code=400, detail="Unsupported file type. Upload CSV, JSON, or PDF.")
 
-    content = await file.read()
     default_hospital = hospital or "Unknown Hospital"
 
-    import uuid as _uuid
-    upload_id = _uuid.uuid4().hex[:12]
-    _upload_progress[upload_id] = {"percent": 5, "stage": "Reading file..."}
+    if upload_id:
+        _check_upload_id(upload_id)
+    else:
+        upload_id = uuid.uuid4().hex[:12]
+    _set_upload_progress(upload_id, 5, "Reading file...")
 
     try:
-        _upload_progress[upload_id] = {"percent": 15, "stage": "Parsing file..."}
-        df, json_structure = preprocess_upload(content, file.filename, default_hospital)
-        _upload_progress[upload_id] = {"percent": 40, "stage": "Normalising columns..."}
+        _set_upload_progress(upload_id, 15, "Parsing file...")
+        # Parse straight from the spooled upload instead of reading it into memory
+        await file.seek(0)
+        df, json_structure = await anyio.to_thread.run_sync(
+            preprocess_upload, file.file, file.filename, default_hospital
+        )
+        _set_upload_progress(upload_id, 40, "Normalising columns...")
 
-        _upload_progress[upload_id] = {"percent": 50, "stage": "Saving standard CSV..."}
-        csv_path = save_standard_csv(df, CSV_ARCHIVE_DIR, filename_prefix="patients")
+        _set_upload_progress(upload_id, 50, "Saving standard CSV...")
+        csv_path = await anyio.to_thread.run_sync(
+            lambda: save_standard_csv(df, CSV_ARCHIVE_DIR, filename_prefix="patients")
+        )
 
         # Insert new patients into MongoDB
-        _upload_progress[upload_id] = {"percent": 60, "stage": "Saving to MongoDB..."}
+        _set_upload_progress(upload_id, 60, "Saving to MongoDB...")
         new_patients_list = []
         for hosp, plist in json_structure["hospitals"].items():
             for p in plist:
@@ -856,27 +1209,24 @@ async def upload_file(file: UploadFile = File(...), hospital: Optional[str] = No
         _invalidate_trials_cache()
 
         # Regenerate federated training CSV
-        _upload_progress[upload_id] = {"percent": 80, "stage": "Generating training CSV..."}
+        _set_upload_progress(upload_id, 80, "Generating training CSV...")
         # Data is now in MongoDB — no need to regenerate CSV files
         # FL training loads directly from MongoDB via data_utils.py
 
         total_patients = await db.count_patients()
-        new_patients = len(new_patients_list)
+        new_patients = inserted_count  # excludes records already on file
         hospitals_in_file = list(json_structure["hospitals"].keys())
 
-        _upload_progress[upload_id] = {"percent": 90, "stage": "Logging to blockchain..."}
-        if blockchain_logger:
-            try:
-                blockchain_logger.log_data_upload(
-                    data_type=ext.replace(".", "").upper(),
-                    source="File Upload",
-                    record_count=new_patients,
-                    hospitals=hospitals_in_file,
-                )
-            except Exception as e:
-                print(f"Failed to log to blockchain: {e}")
+        _set_upload_progress(upload_id, 90, "Logging to blockchain...")
+        # Queued for the audit flusher like every other request-path event
+        _emit_audit(**data_upload_event(
+            data_type=ext.replace(".", "").upper(),
+            source="File Upload",
+            record_count=new_patients,
+            hospitals=hospitals_in_file,
+        ))
 
-        _upload_progress[upload_id] = {"percent": 100, "stage": "Complete"}
+        _set_upload_progress(upload_id, 100, "Complete")
 
         return {
             "message": f"File processed successfully ({ext.upper().replace('.', '')} → MongoDB)",
@@ -890,11 +1240,10 @@ async def upload_file(file: UploadFile = File(...), hospital: Optional[str] = No
         }
 
     except ValueError as ve:
-        _upload_progress[upload_id] = {"percent": -1, "stage": f"Error: {ve}"}
+        _set_upload_progress(upload_id, -1, f"Error: {ve}")
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        _upload_progress[upload_id] = {"percent": -1, "stage": f"Error: {e}"}
-        import traceback
+        _set_upload_progress(upload_id, -1, f"Error: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -911,15 +1260,27 @@ async def get_training_status():
         "latest_metrics": training_logs[-1] if training_logs else None
     }
 
+# Simulated training: rounds generated/persisted per batch, one pause per batch
+_TRAINING_BATCH_ROUNDS = 10
+_TRAINING_BATCH_PACE = 0.5  # default seconds between batches; 0 runs unpaced
+_TRAINING_FLUSH_ROUNDS = 20  # rounds buffered per MongoDB insert_many
+
 @app.post("/start-training")
 async def start_training(request: Dict[str, Any] = None):
-    global is_training, training_logs
+    global is_training, training_logs, _training_task, _training_stop
 
     if is_training:
         raise HTTPException(status_code=400, detail="Training already in progress")
 
+    request = request or {}
+    num_rounds = request.get("num_rounds", 10)
+    try:
+        batch_interval = max(0.0, float(request.get("batch_interval", _TRAINING_BATCH_PACE)))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="batch_interval must be a number of seconds")
+
     is_training = True
-    num_rounds = request.get("num_rounds", 10) if request else 10
+    stop_event = _training_stop = asyncio.Event()
 
     _log_audit(
         action="TRAINING_STARTED",
@@ -929,66 +1290,101 @@ async def start_training(request: Dict[str, Any] = None):
         cooldown=0,  # always log training start
     )
 
-    def run_training_simulation():
+    async def run_training_simulation():
         global is_training, training_logs
-        import random
 
         # Clear previous training logs in MongoDB
         try:
-            sync_db = db.get_sync_db()
-            sync_db.training_logs.delete_many({})
+            await db.clear_training_logs()
         except Exception:
             pass
 
-        try:
-            training_logs = []
-            for round_num in range(1, num_rounds + 1):
-                accuracy = 0.65 + (round_num / num_rounds) * 0.3 + random.uniform(-0.05, 0.05)
-                accuracy = min(0.95, max(0.6, accuracy))
+        pending: List[dict] = []  # rounds not yet written to MongoDB
 
-                loss = 0.5 - (round_num / num_rounds) * 0.3 + random.uniform(-0.05, 0.05)
-                loss = max(0.1, loss)
+        async def flush_pending():
+            if not pending:
+                return
+            try:
+                await db.insert_training_logs_bulk(pending)
+            except Exception as e:
+                print(f"[TRAINING] Failed to persist rounds {pending[0]['round']}-{pending[-1]['round']} to MongoDB: {e}")
+            pending.clear()
 
-                model_hash = f"model_r{round_num}_h{hash(str(round_num)) % 10000}"
+        try:
+            training_logs = []
+            # The simulated curve is pure arithmetic — generate every round up front
+            rng = np.random.default_rng()
+            rounds = np.arange(1, num_rounds + 1)
+            accuracies = np.clip(
+                0.65 + rounds / num_rounds * 0.3 + rng.uniform(-0.05, 0.05, num_rounds), 0.6, 0.95
+            ).round(4)
+            losses = np.maximum(
+                0.1, 0.5 - rounds / num_rounds * 0.3 + rng.uniform(-0.05, 0.05, num_rounds)
+            ).round(4)
+            # Plain Python floats, converted once rather than per round
+            accuracies, losses = accuracies.tolist(), losses.tolist()
+            # Deterministic digest of each simulated round's (round, accuracy, loss)
+            model_hashes = [
+                hashlib.sha256(struct.pack("<Idd", r, a, l)).hexdigest()
+                for r, a, l in zip(range(1, num_rounds + 1), accuracies, losses)
+            ]
 
-                log_entry = {
-                    "round": round_num,
-                    "accuracy": round(accuracy, 4),
-                    "loss": round(loss, 4),
-                    "timestamp": datetime.now().isoformat(),
-                    "model_hash": model_hash,
-                }
-                training_logs.append(log_entry)
+            for batch_start in range(0, num_rounds, _TRAINING_BATCH_ROUNDS):
+                batch_end = min(batch_start + _TRAINING_BATCH_ROUNDS, num_rounds)
+                now = datetime.now().isoformat()
+                batch = [
+                    {
+                        "round": round_num,
+                        "accuracy": accuracies[i],
+                        "loss": losses[i],
+                        "timestamp": now,
+                        "model_hash": model_hashes[i],
+                    }
+                    for i, round_num in enumerate(range(batch_start + 1, batch_end + 1), start=batch_start)
+                ]
+                training_logs.extend(batch)
 
-                # Persist training log to MongoDB (sync)
-                try:
-                    db.insert_training_log_sync(dict(log_entry))
-                except Exception as e:
-                    print(f"[TRAINING] Failed to persist round {round_num} to MongoDB: {e}")
+                # Buffer rounds and write them to MongoDB in bulk
+                pending.extend(batch)
+                if len(pending) >= _TRAINING_FLUSH_ROUNDS:
+                    await flush_pending()
 
-                # Enqueue to blockchain logger
+                # Enqueue the whole batch to the blockchain logger at once (the
+                # mock logger persists it to MongoDB, so keep it off the loop)
                 if blockchain_logger:
                     try:
-                        ok, tx = blockchain_logger.enqueue_training_metadata(
-                            round_number=round_num,
-                            accuracy=float(accuracy),
-                            model_hash=model_hash,
+                        await anyio.to_thread.run_sync(
+                            blockchain_logger.enqueue_training_metadata_batch,
+                            [
+                                {"round_number": e["round"], "accuracy": e["accuracy"], "model_hash": e["model_hash"]}
+                                for e in batch
+                            ],
                         )
                     except Exception as e:
-                        print(f"[TRAINING] Failed to enqueue round {round_num}: {e}")
+                        print(f"[TRAINING] Failed to enqueue rounds {batch[0]['round']}-{batch[-1]['round']}: {e}")
 
-                time.sleep(0.5)
-
-                if not is_training:
+                # Pace per batch (not per round) so the UI still sees progress;
+                # a stop request ends the pause immediately
+                if batch_end < num_rounds and batch_interval:
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), batch_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                # Stopped, or superseded by a newer run while pausing
+                if stop_event.is_set() or _training_task is not asyncio.current_task():
                     break
 
         except Exception as e:
             print(f"Training simulation error: {e}")
         finally:
-            is_training = False
+            # A stopped run may still be finishing when a new one starts;
+            # only the current run persists its rounds and clears the flag
+            if _training_task is asyncio.current_task():
+                await flush_pending()
+                is_training = False
 
-    training_thread = threading.Thread(target=run_training_simulation, daemon=True)
-    training_thread.start()
+    # Runs on the event loop — the simulation only sleeps and awaits Motor
+    _training_task = asyncio.create_task(run_training_simulation())
 
     return {"message": f"Training started with {num_rounds} rounds"}
 
@@ -996,12 +1392,24 @@ async def start_training(request: Dict[str, Any] = None):
 async def stop_training():
     global is_training
     is_training = False
+    if _training_stop is not None:
+        _training_stop.set()
     return {"message": "Training stopped"}
 
 @app.post("/reset-training")
 async def reset_training():
-    global is_training, training_logs
+    global is_training, training_logs, _training_task
     is_training = False
+    if _training_stop is not None:
+        _training_stop.set()
+    # Disown the running simulation so it drops its buffered rounds, and let
+    # any write already in flight finish before the collection is cleared
+    task, _training_task = _training_task, None
+    if task is not None and not task.done():
+        try:
+            await task
+        except Exception:
+            pass
     training_logs = []
     try:
         await db.clear_training_logs()
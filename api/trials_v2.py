@@ -12,6 +12,8 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
+import numpy as np
+import pandas as pd
 from fastapi import APIRouter, HTTPException, Query
 
 import database_v2 as db_v2
@@ -27,6 +29,14 @@ def _get_audit_logger():
     except Exception:
         return None
 
+def _invalidate_main_caches():
+    """Drop main's cached trial definitions after a v2 trial is created/deleted."""
+    try:
+        from api.main import _invalidate_trials_cache
+        _invalidate_trials_cache()
+    except Exception:
+        pass
+
 router = APIRouter(tags=["Trials V2"])
 
 _FEDERATED_COLUMNS = [
@@ -42,69 +52,35 @@ except Exception as exc:
     print(f"[DATABASE_V2] initialization warning: {exc}")
 
 
-def _compute_eligibility(patient: dict, criteria: Dict[str, Any]) -> bool:
-    """Evaluate one patient against trial eligibility criteria."""
-    age = patient.get("age")
-    if age is not None and criteria.get("ageRange"):
-        lo, hi = criteria["ageRange"]
-        if not (lo <= age <= hi):
-            return False
+def _numeric_column(patients: List[dict], field: str) -> np.ndarray:
+    """Pull one numeric field out of the patient dicts as a float array.
 
-    gender = patient.get("gender", "")
-    allowed_genders = criteria.get("genders", [])
-    if allowed_genders and gender and gender not in allowed_genders:
-        return False
-
-    blood_group = patient.get("blood_group", "")
-    allowed_bg = criteria.get("bloodGroups", [])
-    if allowed_bg and blood_group and blood_group not in allowed_bg:
-        return False
-
-    bmi = patient.get("bmi")
-    if bmi is not None and criteria.get("bmiRange"):
-        lo, hi = criteria["bmiRange"]
-        if not (lo <= bmi <= hi):
-            return False
+    Missing and non-numeric values are skipped.
+    """
+    values = pd.to_numeric(pd.Series([p.get(field) for p in patients], dtype=object), errors="coerce")
+    return values.dropna().to_numpy(dtype=np.float64)
 
-    stage = patient.get("stage", "")
-    allowed_stages = criteria.get("stages", [])
-    if allowed_stages and stage and stage not in allowed_stages:
-        return False
 
-    return True
+def _as_number(value: float) -> Any:
+    """Keep whole-number ages as ints, as they are stored."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
 
 
 def _build_criteria_from_patients(patients: List[dict]) -> Dict[str, Any]:
     """Build default criteria from a disease-scoped patient set."""
-    ages, bmis = [], []
-    genders, blood_groups, stages = set(), set(), set()
-
-    for patient in patients:
-        age = patient.get("age")
-        if age is not None:
-            ages.append(age)
-
-        gender = patient.get("gender")
-        if gender:
-            genders.add(gender)
-
-        blood_group = patient.get("blood_group")
-        if blood_group:
-            blood_groups.add(blood_group)
-
-        bmi = patient.get("bmi")
-        if bmi is not None:
-            bmis.append(bmi)
-
-        stage = patient.get("stage")
-        if stage:
-            stages.add(stage)
+    # Numeric ranges are reduced over contiguous arrays instead of per-dict appends
+    ages = _numeric_column(patients, "age")
+    bmis = _numeric_column(patients, "bmi")
+    genders = {g for p in patients if (g := p.get("gender"))}
+    blood_groups = {bg for p in patients if (bg := p.get("blood_group"))}
+    stages = {st for p in patients if (st := p.get("stage"))}
 
     return {
-        "ageRange": [min(ages), max(ages)] if ages else [18, 85],
+        "ageRange": [_as_number(ages.min()), _as_number(ages.max())] if ages.size else [18, 85],
         "genders": sorted(genders) if genders else ["Male", "Female"],
         "bloodGroups": sorted(blood_groups) if blood_groups else [],
-        "bmiRange": [round(min(bmis), 1), round(max(bmis), 1)] if bmis else [15.0, 40.0],
+        "bmiRange": [round(float(bmis.min()), 1), round(float(bmis.max()), 1)] if bmis.size else [15.0, 40.0],
         "stages": sorted(stages) if stages else [],
     }
 
@@ -222,6 +198,7 @@ async def create_trial_v2(
         }
 
         created = await db_v2.create_trial(trial_doc)
+        _invalidate_main_caches()
         
         # Auto-enroll patients with matching disease if enabled
         enrollment_result = None
@@ -401,6 +378,7 @@ async def delete_trial_v2(drug_name: str, hospital: Optional[str] = Query(defaul
         result = await db.trials.delete_one({"drugName": drug_name})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail=f"Trial '{drug_name}' not found")
+        _invalidate_main_caches()
 
         # Audit log: trial deleted
         _audit = _get_audit_logger()
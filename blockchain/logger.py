@@ -8,7 +8,7 @@ import hashlib
 import traceback
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 
 # MongoDB persistence helper (imported lazily to avoid circular imports)
@@ -43,6 +43,19 @@ except Exception:
     Account = None
 
 
+def data_upload_event(data_type: str, source: str, record_count: int,
+                      hospitals: list = None) -> Dict[str, Any]:
+    """Audit event fields for a patient data upload (see log_data_upload)."""
+    hosp_str = ", ".join(hospitals) if hospitals else "Unknown"
+    return {
+        "action": "DATA_UPLOAD",
+        "details": f"{data_type} file uploaded from {source} ({record_count} records, hospitals: {hosp_str})",
+        "actor": source,
+        "record_count": record_count,
+        "metadata": {"data_type": data_type, "hospitals": hospitals or [], "record_count": record_count},
+    }
+
+
 class ConfigurationError(Exception):
     """Raised when required blockchain configuration is missing or invalid."""
 
@@ -102,6 +115,15 @@ class MockBlockchainLogger:
         except Exception as e:
             logger.warning(f"Could not persist audit log to MongoDB: {e}")
 
+    def _persist_audit_batch_to_mongo(self, entries: List[dict]) -> None:
+        """Write several audit log entries to MongoDB in one round-trip (best-effort)."""
+        if self._db_module is None or not entries:
+            return
+        try:
+            self._db_module.insert_audit_logs_sync(entries)
+        except Exception as e:
+            logger.warning(f"Could not persist {len(entries)} audit logs to MongoDB: {e}")
+
     def _persist_training_to_mongo(self, entry: dict) -> None:
         """Write a single training log entry to MongoDB (best-effort)."""
         if self._db_module is None:
@@ -111,6 +133,15 @@ class MockBlockchainLogger:
         except Exception as e:
             logger.warning(f"Could not persist training log to MongoDB: {e}")
 
+    def _persist_training_batch_to_mongo(self, entries: List[dict]) -> None:
+        """Write several training log entries to MongoDB in one round-trip (best-effort)."""
+        if self._db_module is None or not entries:
+            return
+        try:
+            self._db_module.insert_training_logs_bulk_sync(entries)
+        except Exception as e:
+            logger.warning(f"Could not persist {len(entries)} training logs to MongoDB: {e}")
+
     def _generate_tx_hash(self, seed: str = "") -> str:
         """Generate a realistic-looking mock transaction hash."""
         raw = f"{seed}_{time.time()}_{len(self._audit_logs)}"
@@ -157,6 +188,40 @@ class MockBlockchainLogger:
             logger.error(f"Mock enqueue failed: {e}")
             return False, str(e)
 
+    def enqueue_training_metadata_batch(self, rounds: List[Dict[str, Any]]) -> List[Tuple[bool, Optional[str]]]:
+        """Enqueue several training rounds with one MongoDB write per collection.
+
+        Each item takes the same fields as :meth:`enqueue_training_metadata`.
+        """
+        ts = int(time.time())
+        entries, audit_entries = [], []
+        for r in rounds:
+            round_number, accuracy, model_hash = r["round_number"], r["accuracy"], r["model_hash"]
+            tx_hash = self._generate_tx_hash(f"training_{round_number}")
+            entries.append({
+                "round_number": round_number,
+                "accuracy": accuracy,
+                "model_hash": model_hash,
+                "timestamp": ts,
+                "txHash": tx_hash,
+            })
+            audit_entries.append({
+                "action": "TRAINING_ROUND",
+                "details": f"Round {round_number} completed — accuracy {accuracy:.4f}",
+                "actor": "FL Server",
+                "record_count": 1,
+                "timestamp": ts,
+                "txHash": tx_hash,
+                "metadata": {"round": round_number, "accuracy": accuracy, "model_hash": model_hash},
+            })
+        with self._lock:
+            self._logs.extend(entries)
+            self._audit_logs.extend(audit_entries)
+        self._persist_training_batch_to_mongo(entries)
+        self._persist_audit_batch_to_mongo(audit_entries)
+        logger.info(f"Mock enqueued training metadata for {len(entries)} rounds")
+        return [(True, e["txHash"]) for e in entries]
+
     def log_event(self, action: str, details: str = "", actor: str = "System",
                   record_count: int = 0, metadata: Dict[str, Any] = None) -> str:
         """Log a general audit event (patient upload, eligibility check, etc.)."""
@@ -177,17 +242,37 @@ class MockBlockchainLogger:
         logger.info(f"Mock audit log: {action} — {details}")
         return tx_hash
 
+    def log_events_batch(self, events: List[Dict[str, Any]]) -> List[str]:
+        """Log several audit events with a single MongoDB write.
+
+        Each event takes the same fields as :meth:`log_event`, plus an
+        optional ``timestamp`` recorded when the event was queued.
+        """
+        entries = []
+        for i, ev in enumerate(events):
+            action = ev.get("action", "")
+            details = ev.get("details", "")
+            entries.append({
+                "action": action,
+                "details": details,
+                "actor": ev.get("actor", "System"),
+                "record_count": ev.get("record_count", 0),
+                "timestamp": ev.get("timestamp") or int(time.time()),
+                # Entries are appended after the loop, so the batch index keeps
+                # identical events in one batch from sharing a hash
+                "txHash": self._generate_tx_hash(f"{action}_{details}_{i}"),
+                "metadata": ev.get("metadata") or {},
+            })
+        with self._lock:
+            self._audit_logs.extend(entries)
+        self._persist_audit_batch_to_mongo(entries)
+        logger.info(f"Mock audit log batch: {len(entries)} events")
+        return [e["txHash"] for e in entries]
+
     def log_data_upload(self, data_type: str, source: str, record_count: int,
                         hospitals: list = None) -> str:
         """Log a patient data upload event."""
-        hosp_str = ", ".join(hospitals) if hospitals else "Unknown"
-        return self.log_event(
-            action="DATA_UPLOAD",
-            details=f"{data_type} file uploaded from {source} ({record_count} records, hospitals: {hosp_str})",
-            actor=source,
-            record_count=record_count,
-            metadata={"data_type": data_type, "hospitals": hospitals or [], "record_count": record_count},
-        )
+        return self.log_event(**data_upload_event(data_type, source, record_count, hospitals))
 
     def log_patient_action(self, action: str, patient_count: int = 0,
                            actor: str = "System", details: str = "") -> str:
@@ -666,6 +751,13 @@ class BlockchainLogger:
         logger.info(f"Enqueued round {round_number} for blockchain logging (queue size={self._queue.qsize()})")
         return True, None
 
+    def enqueue_training_metadata_batch(self, rounds: List[Dict[str, Any]]) -> List[Tuple[bool, Optional[str]]]:
+        """Enqueue several training rounds; see :meth:`enqueue_training_metadata`."""
+        return [
+            self.enqueue_training_metadata(r["round_number"], r["accuracy"], r["model_hash"])
+            for r in rounds
+        ]
+
     def flush(self, timeout: Optional[float] = None) -> None:
         """Block until queue is empty or until timeout (seconds) elapses."""
         start = time.time()
@@ -754,6 +846,15 @@ class BlockchainLogger:
         except Exception as e:
             logger.warning(f"Could not persist audit log to MongoDB: {e}")
 
+    def _persist_audit_batch_to_mongo(self, entries: List[dict]) -> None:
+        """Write several audit log entries to MongoDB in one round-trip (best-effort)."""
+        if self._db_module is None or not entries:
+            return
+        try:
+            self._db_module.insert_audit_logs_sync(entries)
+        except Exception as e:
+            logger.warning(f"Could not persist {len(entries)} audit logs to MongoDB: {e}")
+
     def log_event(self, action: str, details: str = "", actor: str = "System",
                   record_count: int = 0, metadata: Dict[str, Any] = None) -> str:
         """Log a general audit event (patient upload, eligibility check, etc.)."""
@@ -774,17 +875,37 @@ class BlockchainLogger:
         logger.info(f"Audit log: {action} — {details}")
         return tx_hash
 
+    def log_events_batch(self, events: List[Dict[str, Any]]) -> List[str]:
+        """Log several audit events with a single MongoDB write.
+
+        Each event takes the same fields as :meth:`log_event`, plus an
+        optional ``timestamp`` recorded when the event was queued.
+        """
+        entries = []
+        for i, ev in enumerate(events):
+            action = ev.get("action", "")
+            details = ev.get("details", "")
+            entries.append({
+                "action": action,
+                "details": details,
+                "actor": ev.get("actor", "System"),
+                "record_count": ev.get("record_count", 0),
+                "timestamp": ev.get("timestamp") or int(time.time()),
+                # Entries are appended after the loop, so the batch index keeps
+                # identical events in one batch from sharing a hash
+                "txHash": self._generate_tx_hash(f"{action}_{details}_{i}"),
+                "metadata": ev.get("metadata") or {},
+            })
+        with self._audit_lock:
+            self._audit_logs.extend(entries)
+        self._persist_audit_batch_to_mongo(entries)
+        logger.info(f"Audit log batch: {len(entries)} events")
+        return [e["txHash"] for e in entries]
+
     def log_data_upload(self, data_type: str, source: str, record_count: int,
                         hospitals: list = None) -> str:
         """Log a patient data upload event."""
-        hosp_str = ", ".join(hospitals) if hospitals else "Unknown"
-        return self.log_event(
-            action="DATA_UPLOAD",
-            details=f"{data_type} file uploaded from {source} ({record_count} records, hospitals: {hosp_str})",
-            actor=source,
-            record_count=record_count,
-            metadata={"data_type": data_type, "hospitals": hospitals or [], "record_count": record_count},
-        )
+        return self.log_event(**data_upload_event(data_type, source, record_count, hospitals))
 
     def log_patient_action(self, action: str, patient_count: int = 0,
                            actor: str = "System", details: str = "") -> str:
@@ -1,8 +1,9 @@
 import flwr as fl
 import numpy as np
+import tensorflow as tf
 from typing import Dict, List, Tuple
 from model import create_model
-from data_utils import load_and_preprocess_data
+from data_utils import get_preprocessed
 
 class MedicalClient(fl.client.NumPyClient):
     def __init__(self, client_id: int, X_train: np.ndarray, y_train: np.ndarray,
@@ -15,6 +16,26 @@ class MedicalClient(fl.client.NumPyClient):
         self.class_weights = class_weights
         self.model = create_model(X_train.shape[1])
 
+        # Build the input pipelines once; tensors are cached after the first
+        # epoch and batches are prefetched while the previous step trains
+        self.train_ds = (
+            tf.data.Dataset.from_tensor_slices(
+                (X_train.astype(np.float32), y_train.astype(np.float32))
+            )
+            .cache()
+            .shuffle(len(X_train), seed=client_id, reshuffle_each_iteration=True)
+            .batch(16)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+        self.test_ds = (
+            tf.data.Dataset.from_tensor_slices(
+                (X_test.astype(np.float32), y_test.astype(np.float32))
+            )
+            .cache()
+            .batch(32)
+            .prefetch(tf.data.AUTOTUNE)
+        )
+
     def get_parameters(self, config: Dict[str, fl.common.Scalar]) -> List[np.ndarray]:
         """Return model parameters."""
         return self.model.get_weights()
@@ -25,9 +46,8 @@ class MedicalClient(fl.client.NumPyClient):
 
         # Train with class weights
         self.model.fit(
-            self.X_train, self.y_train,
+            self.train_ds,
             epochs=5,
-            batch_size=16,
             verbose=0,
             class_weight=self.class_weights
         )
@@ -37,7 +57,7 @@ class MedicalClient(fl.client.NumPyClient):
     def evaluate(self, parameters: List[np.ndarray], config: Dict[str, fl.common.Scalar]) -> Tuple[float, int, Dict[str, fl.common.Scalar]]:
         """Evaluate the model locally."""
         self.model.set_weights(parameters)
-        loss, accuracy = self.model.evaluate(self.X_test, self.y_test, verbose=0)
+        loss, accuracy = self.model.evaluate(self.test_ds, verbose=0)
 
         return loss, len(self.X_test), {"accuracy": accuracy}
 
@@ -51,8 +71,11 @@ def create_clients(num_clients: int = 5) -> List[MedicalClient]:
     Returns:
         List of MedicalClient instances
     """
-    # Load full dataset
-    X_train, X_test, y_train, y_test, class_weights = load_and_preprocess_data()
+    # Load full dataset (shared with the server's evaluation)
+    data = get_preprocessed()
+    X_train, X_test = data["X_train"], data["X_test"]
+    y_train, y_test = data["y_train"], data["y_test"]
+    class_weights = data["class_weights"]
 
     # Split training data among clients
     train_size = len(X_train) // num_clients
@@ -1,12 +1,22 @@
+import threading
+import time
+from typing import Optional
+
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.utils.class_weight import compute_class_weight
 
 # Gender and stage encoding maps (must match preprocessing.py)
 _GENDER_MAP = {"Male": 0, "Female": 1}
 _STAGE_MAP = {"I": 1, "II": 2, "III": 3, "IV": 4}
+_FEATURE_COLUMNS = ["age", "gender_enc", "num_comorbidities", "stage_enc", "bmi"]
+
+# Preprocessed split shared by clients and the server (see get_preprocessed)
+_PREPROCESSED_TTL = 300  # seconds
+_preprocessed: Optional[dict] = None
+_preprocessed_ts = 0.0
+_preprocessed_lock = threading.Lock()
 
 
 def _load_patients_from_mongo() -> pd.DataFrame:
@@ -29,14 +39,14 @@ def _load_patients_from_mongo() -> pd.DataFrame:
 
     df = pd.DataFrame(patients)
 
-    # Encode columns for training
-    df["gender_enc"] = df["gender"].map(_GENDER_MAP).fillna(0).astype(int)
+    # Encode columns for training (compact dtypes — Keras trains in float32)
+    df["gender_enc"] = df["gender"].map(_GENDER_MAP).fillna(0).astype(np.int8)
     df["num_comorbidities"] = df["comorbidities"].apply(
         lambda x: len(x) if isinstance(x, list) else 0
-    )
-    df["stage_enc"] = df["stage"].map(_STAGE_MAP).fillna(2).astype(int)
-    df["bmi"] = df["bmi"].astype(float)
-    df["age"] = df["age"].astype(float)
+    ).astype(np.int8)
+    df["stage_enc"] = df["stage"].map(_STAGE_MAP).fillna(2).astype(np.int8)
+    df["bmi"] = df["bmi"].astype(np.float32)
+    df["age"] = df["age"].astype(np.float32)
 
     # Default eligible to 0 if missing, then assign synthetic labels
     # for training (real eligibility is computed per-trial at inference time)
@@ -52,27 +62,38 @@ def _load_patients_from_mongo() -> pd.DataFrame:
             + (df["bmi"].between(18.5, 30)).astype(float) * 0.2
         )
         noise = np.random.uniform(0, 0.3, len(df))
-        df["eligible"] = ((score + noise) > 0.5).astype(int)
+        df["eligible"] = ((score + noise) > 0.5).astype(np.int8)
     else:
-        df["eligible"] = df["eligible"].fillna(0).astype(int)
+        df["eligible"] = df["eligible"].fillna(0).astype(np.int8)
 
     return df
 
 
-def load_and_preprocess_data():
-    """
-    Loads patient data from MongoDB and preprocesses it for training.
+def fit_scaler_params(X: np.ndarray) -> dict:
+    """Per-feature mean and std (computed in float64) for standardizing X."""
+    mean = X.mean(axis=0, dtype=np.float64)
+    std = X.std(axis=0, dtype=np.float64)
+    std[std == 0] = 1.0  # constant features pass through unscaled
+    return {"mean": mean.tolist(), "std": std.tolist()}
 
-    Returns:
-        Tuple of (X_train, X_test, y_train, y_test, class_weights)
-    """
+
+def scale_features(X: np.ndarray, scaler_params: dict) -> np.ndarray:
+    """Standardize X with previously fitted params; returns float32."""
+    mean = np.asarray(scaler_params["mean"], dtype=np.float64)
+    std = np.asarray(scaler_params["std"], dtype=np.float64)
+    return ((X - mean) / std).astype(np.float32)
+
+
+def _preprocess() -> dict:
+    """Load from MongoDB, scale features and split into train/test sets."""
     df = _load_patients_from_mongo()
 
-    X = df[["age", "gender_enc", "num_comorbidities", "stage_enc", "bmi"]]
-    y = df["eligible"]
+    X = df[_FEATURE_COLUMNS].to_numpy(dtype=np.float32)
+    y = df["eligible"].to_numpy(dtype=np.int8)
 
-    scaler = StandardScaler()
-    X = scaler.fit_transform(X)
+    # Standardize with NumPy directly (same result as StandardScaler)
+    scaler_params = fit_scaler_params(X)
+    X = scale_features(X, scaler_params)
 
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, stratify=y, random_state=42
@@ -86,4 +107,43 @@ def load_and_preprocess_data():
         class_weights = compute_class_weight('balanced', classes=unique_classes, y=y_train)
         class_weight_dict = {int(c): float(w) for c, w in zip(unique_classes, class_weights)}
 
-    return X_train, X_test, y_train, y_test, class_weight_dict
\ No newline at end of file
+    return {
+        "X_train": X_train,
+        "X_test": X_test,
+        "y_train": y_train,
+        "y_test": y_test,
+        "class_weights": class_weight_dict,
+        "scaler_params": scaler_params,
+    }
+
+
+def get_preprocessed(refresh: bool = False) -> dict:
+    """
+    Shared preprocessed dataset for clients and the server.
+
+    The MongoDB load and scaler fit run at most once per
+    _PREPROCESSED_TTL seconds (or when *refresh* is set); callers get the
+    same arrays and fitted ``scaler_params``, so new rows can be scaled with
+    ``scale_features`` instead of re-fitting. Treat the arrays as read-only.
+
+    Returns:
+        Dict with X_train, X_test, y_train, y_test, class_weights, scaler_params
+    """
+    global _preprocessed, _preprocessed_ts
+    with _preprocessed_lock:
+        stale = time.monotonic() - _preprocessed_ts >= _PREPROCESSED_TTL
+        if refresh or _preprocessed is None or stale:
+            _preprocessed = _preprocess()
+            _preprocessed_ts = time.monotonic()
+        return _preprocessed
+
+
+def load_and_preprocess_data():
+    """
+    Loads patient data from MongoDB and preprocesses it for training.
+
+    Returns:
+        Tuple of (X_train, X_test, y_train, y_test, class_weights)
+    """
+    data = _preprocess()
+    return data["X_train"], data["X_test"], data["y_train"], data["y_test"], data["class_weights"]
@@ -13,16 +13,23 @@ PyMongo (sync) for startup seeding and blockchain logger.
 """
 
 import os
+import re
 import time
+import queue
+import atexit
+import asyncio
+import threading
 import json
 import logging
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 import dotenv
 import certifi
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import BulkWriteError
+from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT, UpdateOne, WriteConcern
+from pymongo.errors import BulkWriteError, OperationFailure
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -31,6 +38,25 @@ dotenv.load_dotenv()  # Load from .env if available
 MONGO_URI = (os.getenv("MONGO_URI") or "").strip()
 DB_NAME = (os.getenv("MONGO_DB_NAME") or "").strip()
 
+# Shared by the async and sync clients here and in database_v2.py. zstd is
+# used when the zstandard package is installed (pymongo[zstd]); otherwise the
+# driver falls back to zlib.
+MONGO_CLIENT_OPTIONS = {
+    "compressors": "zstd,zlib",
+    "zlibCompressionLevel": 3,
+    "maxPoolSize": 32,
+    "maxIdleTimeMS": 60000,
+    "retryWrites": True,
+}
+# The request path shares one async client: keep warm connections so hot
+# endpoints never pay connection setup, and allow headroom for concurrency.
+_ASYNC_POOL_OPTIONS = {
+    "maxPoolSize": 200,
+    "minPoolSize": 10,
+    "maxIdleTimeMS": 300_000,
+    "serverSelectionTimeoutMS": 3000,
+}
+
 logger = logging.getLogger("database")
 if not logger.handlers:
     handler = logging.StreamHandler()
@@ -43,28 +69,39 @@ logger.setLevel(logging.INFO)
 # ---------------------------------------------------------------------------
 _async_client: Optional[AsyncIOMotorClient] = None
 _sync_client: Optional[MongoClient] = None
+# Database handles, cached so helpers don't build a new proxy per call
+_async_db = None
+_sync_db = None
 
 
 def get_async_client() -> AsyncIOMotorClient:
     global _async_client
     if _async_client is None:
-        _async_client = AsyncIOMotorClient(MONGO_URI, tlsCAFile=certifi.where())
+        _async_client = AsyncIOMotorClient(
+            MONGO_URI, tlsCAFile=certifi.where(), **{**MONGO_CLIENT_OPTIONS, **_ASYNC_POOL_OPTIONS}
+        )
     return _async_client
 
 
 def get_sync_client() -> MongoClient:
     global _sync_client
     if _sync_client is None:
-        _sync_client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
+        _sync_client = MongoClient(MONGO_URI, tlsCAFile=certifi.where(), **MONGO_CLIENT_OPTIONS)
     return _sync_client
 
 
 def get_async_db():
-    return get_async_client()[DB_NAME]
+    global _async_db
+    if _async_db is None:
+        _async_db = get_async_client()[DB_NAME]
+    return _async_db
 
 
 def get_sync_db():
-    return get_sync_client()[DB_NAME]
+    global _sync_db
+    if _sync_db is None:
+        _sync_db = get_sync_client()[DB_NAME]
+    return _sync_db
 
 
 # ---------------------------------------------------------------------------
@@ -75,7 +112,6 @@ def ensure_indexes():
     db = get_sync_db()
     try:
         db.patients.create_index([("patient_id", ASCENDING)], unique=False)
-        db.patients.create_index([("disease", ASCENDING)])
         db.patients.create_index([("age", ASCENDING)])
         db.patients.create_index([("gender", ASCENDING)])
         db.patients.create_index([("hospital_name", ASCENDING)])
@@ -89,6 +125,23 @@ def ensure_indexes():
             ("patient_name", ASCENDING),
             ("disease", ASCENDING),
         ], name="text_search_fields")
+        # /patients is hospital-scoped; these let a sorted page walk an index
+        # instead of sorting the hospital's records in memory
+        for field in _PATIENT_SORT_INDEX_FIELDS:
+            db.patients.create_index(
+                [("hospital_name", ASCENDING), (field, ASCENDING)],
+                name=f"hospital_sort_{field}",
+            )
+        # Compound index for disease-scoped eligibility screening; its
+        # (disease, age) prefix also serves disease lookups and disease +
+        # age-range filters, so there is no separate disease index
+        db.patients.create_index([
+            ("disease", ASCENDING),
+            ("age", ASCENDING),
+            ("gender", ASCENDING),
+            ("blood_group", ASCENDING),
+            ("stage", ASCENDING),
+        ], name="eligibility_screen")
 
         db.audit_logs.create_index([("timestamp", DESCENDING)])
         db.audit_logs.create_index([("action", ASCENDING)])
@@ -103,6 +156,16 @@ def ensure_indexes():
     except Exception as e:
         logger.warning(f"Index creation issue (non-fatal): {e}")
 
+    # Text index backing patient search — separate so a conflicting text
+    # index (only one is allowed per collection) doesn't block the rest
+    try:
+        db.patients.create_index(
+            [(field, TEXT) for field in _PATIENT_SEARCH_FIELDS],
+            name="patient_text",
+        )
+    except Exception as e:
+        logger.warning(f"Patient text index not created (search uses regex): {e}")
+
 
 # ---------------------------------------------------------------------------
 # Seed helpers — migrate existing JSON data to MongoDB (runs once)
@@ -278,6 +341,23 @@ def seed_audit_logs_from_json(json_path: str):
         logger.warning(f"Failed to migrate audit logs: {e}")
 
 
+def rebuild_disease_counts():
+    """Recompute the disease_counts collection from the patients collection.
+
+    insert_patients keeps it current with $inc; rebuilding at startup picks
+    up any patients written outside this module.
+    """
+    db = get_sync_db()
+    try:
+        db.patients.aggregate([
+            {"$match": {"disease": {"$nin": [None, ""]}}},
+            {"$group": {"_id": "$disease", "count": {"$sum": 1}}},
+            {"$out": "disease_counts"},
+        ])
+    except Exception as e:
+        logger.warning(f"Could not rebuild disease counts (reads fall back to $group): {e}")
+
+
 # ---------------------------------------------------------------------------
 # Full seed/init (called once at server startup)
 # ---------------------------------------------------------------------------
@@ -299,6 +379,7 @@ def init_database():
     ensure_indexes()
     seed_hospitals()
     seed_trials()
+    rebuild_disease_counts()
 
     # Report current collection sizes
     db = get_sync_db()
@@ -316,7 +397,10 @@ def init_database():
 
 async def count_patients(filter_query: dict = None) -> int:
     db = get_async_db()
-    return await db.patients.count_documents(filter_query or {})
+    if not filter_query:
+        # Unfiltered total comes from collection metadata — no scan
+        return await db.patients.estimated_document_count()
+    return await db.patients.count_documents(filter_query)
 
 
 async def count_patients_for_hospital(hospital_name: str) -> int:
@@ -325,6 +409,66 @@ async def count_patients_for_hospital(hospital_name: str) -> int:
     return await db.patients.count_documents({"hospital_name": hospital_name})
 
 
+# Fields covered by patient search (text index + regex fallback)
+_PATIENT_SEARCH_FIELDS = (
+    "patient_id", "patient_name", "disease", "gender", "blood_group",
+    "stage", "phone", "email", "address",
+)
+# Common /patients sort columns, indexed behind hospital_name (patient_id is
+# covered by hospital_patient_lookup)
+_PATIENT_SORT_INDEX_FIELDS = ("age", "bmi", "admission_date", "disease")
+# Searches this short match field prefixes only — a one- or two-character
+# substring hits nearly every record and forces a full scan for little value
+_PREFIX_SEARCH_MAX_LEN = 2
+
+
+# Search terms that $text can answer exactly: a single word. $text ORs
+# tokens and splits on punctuation, so names, emails, phone numbers and
+# blood groups like "O+" must go through the substring regex instead.
+_TEXT_SEARCHABLE = re.compile(r"^\w+$")
+
+
+def _patient_search_clauses(search: str) -> Tuple[Optional[dict], dict]:
+    """Return ``($text clause or None, regex clause)`` for a patient search.
+
+    The regex clause matches *search* as a case-insensitive substring of any
+    search field (a prefix for very short terms).
+    """
+    text_clause = None
+    if _TEXT_SEARCHABLE.match(search):
+        # Quoted as a phrase so the term is matched as-is
+        text_clause = {"$text": {"$search": f'"{search}"'}}
+    # Escape once and share one compiled pattern across every field
+    pattern = re.escape(search)
+    if len(search) <= _PREFIX_SEARCH_MAX_LEN:
+        pattern = f"^{pattern}"
+    regex = re.compile(pattern, re.IGNORECASE)
+    return text_clause, {"$or": [{field: regex} for field in _PATIENT_SEARCH_FIELDS]}
+
+
+# Patient table columns: hidden fields and preferred display order
+# (personal details first, then medical)
+_HIDDEN_COLUMNS = frozenset({"eligible", "drug_worked", "drug", "hospital_name"})
+_PREFERRED_COLUMN_ORDER = (
+    "patient_id", "patient_name", "age", "gender", "phone", "email",
+    "address", "blood_group", "disease", "stage", "comorbidities",
+    "bmi", "diagnosis_date", "admission_date", "emergency_contact",
+    "hospital_name",
+)
+
+
+@lru_cache(maxsize=64)
+def _ordered_columns(keys: frozenset) -> tuple:
+    """Display columns for a set of patient keys (the schema rarely changes,
+    so the ordering is computed once per distinct key set)."""
+    remaining = keys - _HIDDEN_COLUMNS
+    # Add columns in preferred order first, then any remaining
+    columns = [c for c in _PREFERRED_COLUMN_ORDER if c in remaining]
+    # Append any extra columns not in the preferred list
+    columns.extend(sorted(remaining.difference(columns)))
+    return tuple(columns)
+
+
 async def get_patients_paginated(
     page: int = 1,
     page_size: int = 50,
@@ -345,39 +489,48 @@ async def get_patients_paginated(
     if hospital_name:
         query["hospital_name"] = hospital_name
 
+    total = None
+    text_search = False
     if search:
-        # Text search across key fields
-        regex = {"$regex": search, "$options": "i"}
-        search_clause = [
-            {"patient_id": regex},
-            {"patient_name": regex},
-            {"disease": regex},
-            {"gender": regex},
-            {"blood_group": regex},
-            {"stage": regex},
-            {"phone": regex},
-            {"email": regex},
-            {"address": regex},
-        ]
-        if hospital_name:
-            # Combine hospital filter with text search
-            query = {"$and": [{"hospital_name": hospital_name}, {"$or": search_clause}]}
+        text_clause, regex_clause = _patient_search_clauses(search)
+        if text_clause:
+            # Indexed $text lookup first (whole word, via the patient_text index)
+            text_query = {**query, **text_clause}
+            try:
+                total = await db.patients.count_documents(text_query)
+            except (OperationFailure, NotImplementedError):
+                total = 0  # no text index available
+            if total:
+                query, text_search = text_query, True
+            else:
+                total = None  # nothing matched as a word — substring search
+        if not text_search:
+            if hospital_name:
+                # Combine hospital filter with text search
+                query = {"$and": [{"hospital_name": hospital_name}, regex_clause]}
+            else:
+                query.update(regex_clause)
+
+    if total is None:
+        if query:
+            total = await db.patients.count_documents(query)
         else:
-            query["$or"] = search_clause
-
-    total = await db.patients.count_documents(query)
+            # Plain browse — collection metadata count instead of a scan
+            total = await db.patients.estimated_document_count()
 
     # Sort
     sort_spec = None
     if sort_by:
         direction = DESCENDING if sort_dir == "desc" else ASCENDING
         sort_spec = [(sort_by, direction)]
+    elif text_search:
+        sort_spec = [("score", {"$meta": "textScore"})]
 
     # Pagination
     page = max(1, page)
     page_size = min(max(1, page_size), 200)
     skip = (page - 1) * page_size
-    total_pages = max(1, -(-total // page_size))
+    total_pages = max(1, (total + page_size - 1) // page_size)
 
     cursor = db.patients.find(query, {"_id": 0})
     if sort_spec:
@@ -388,25 +541,8 @@ async def get_patients_paginated(
 
     # Detect columns from first batch — enforce preferred order
     columns = []
-    hidden = {"eligible", "drug_worked", "drug", "hospital_name"}
-    # Preferred column order: personal details first, then medical
-    PREFERRED_ORDER = [
-        "patient_id", "patient_name", "age", "gender", "phone", "email",
-        "address", "blood_group", "disease", "stage", "comorbidities",
-        "bmi", "diagnosis_date", "admission_date", "emergency_contact",
-        "hospital_name",
-    ]
     if patients:
-        all_keys = set()
-        for p in patients[:20]:
-            all_keys.update(k for k in p.keys() if k not in hidden)
-        # Add columns in preferred order first, then any remaining
-        for col in PREFERRED_ORDER:
-            if col in all_keys:
-                columns.append(col)
-                all_keys.discard(col)
-        # Append any extra columns not in the preferred list
-        columns.extend(sorted(all_keys))
+        columns = list(_ordered_columns(frozenset().union(*(p.keys() for p in patients[:20]))))
 
     return {
         "patients": patients,
@@ -418,10 +554,18 @@ async def get_patients_paginated(
     }
 
 
-async def get_all_patients_list() -> List[dict]:
-    """Return ALL patients as a list (for trial eligibility computation)."""
+# Documents per getMore when streaming whole-collection reads
+_STREAM_BATCH_SIZE = 2000
+
+
+async def get_all_patients_list(fields: Optional[List[str]] = None) -> List[dict]:
+    """Return ALL patients as a list (for trial eligibility computation).
+
+    Pass *fields* to fetch only those fields instead of whole documents.
+    """
     db = get_async_db()
-    cursor = db.patients.find({}, {"_id": 0})
+    projection = {"_id": 0, **{f: 1 for f in fields}} if fields else {"_id": 0}
+    cursor = db.patients.find({}, projection).batch_size(_STREAM_BATCH_SIZE)
     return await cursor.to_list(length=None)
 
 
@@ -433,57 +577,233 @@ _ELIGIBILITY_PROJECTION = {
 }
 
 
-async def get_all_patients_for_eligibility() -> List[dict]:
+async def get_all_patients_for_eligibility(projection: Optional[dict] = None) -> List[dict]:
     """Return ALL patients with only the fields needed for eligibility.
 
     This is much faster than get_all_patients_list() because personal
     fields (phone, email, address, etc.) are excluded via projection.
+    Pass *projection* to narrow the returned fields further.
     """
     db = get_async_db()
-    cursor = db.patients.find({}, _ELIGIBILITY_PROJECTION)
+    cursor = db.patients.find({}, projection or _ELIGIBILITY_PROJECTION).batch_size(_STREAM_BATCH_SIZE)
     return await cursor.to_list(length=None)
 
 
-async def get_patient_sample(size: int = 2000) -> List[dict]:
+async def get_patient_sample(size: int = 2000, projection: Optional[dict] = None) -> List[dict]:
     """Return a random sample of patients for estimation.
 
     Uses MongoDB $sample aggregation stage for efficient random sampling.
     """
     db = get_async_db()
-    total = await db.patients.count_documents({})
+    projection = projection or _ELIGIBILITY_PROJECTION
+    # Only decides sample vs. full read, so the metadata count is enough
+    total = await db.patients.estimated_document_count()
     if total <= size:
-        cursor = db.patients.find({}, _ELIGIBILITY_PROJECTION)
+        cursor = db.patients.find({}, projection)
         return await cursor.to_list(length=None)
     pipeline = [
         {"$sample": {"size": size}},
-        {"$project": _ELIGIBILITY_PROJECTION},
+        {"$project": projection},
     ]
     return [doc async for doc in db.patients.aggregate(pipeline)]
 
 
 async def get_disease_counts() -> Dict[str, int]:
-    """Aggregate patient counts by disease."""
+    """Patient counts by disease, most common first.
+
+    Read from the disease_counts collection; the dict preserves the order.
+    """
     db = get_async_db()
+    result = {}
+    cursor = db.disease_counts.find({}, {"_id": 1, "count": 1}).sort([("count", DESCENDING), ("_id", ASCENDING)])
+    async for doc in cursor:
+        if doc["_id"] and doc.get("count", 0) > 0:
+            result[doc["_id"]] = doc["count"]
+    if result:
+        return result
+
+    # Not built yet — aggregate over the patients directly
     pipeline = [
         {"$group": {"_id": "$disease", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
     ]
-    result = {}
     async for doc in db.patients.aggregate(pipeline):
         if doc["_id"]:
             result[doc["_id"]] = doc["count"]
     return result
 
 
-async def get_patients_for_disease(disease: str) -> List[dict]:
-    """Return patients with a specific disease."""
+async def get_trial_params_by_disease() -> Dict[str, Dict[str, Any]]:
+    """Per-disease eligibility stats over every patient, computed in MongoDB.
+
+    Returns ``{disease: {min_age, max_age, min_bmi, max_bmi, genders,
+    blood_groups, stages, top_comorbidities}}``. Only numeric ages/BMIs
+    count toward the ranges; the categorical lists are raw distinct values.
+    """
     db = get_async_db()
-    cursor = db.patients.find({"disease": disease}, {"_id": 0})
+
+    def _numeric(field: str) -> dict:
+        return {"$cond": [{"$isNumber": f"${field}"}, f"${field}", None]}
+
+    stats_pipeline = [
+        {"$group": {
+            "_id": "$disease",
+            "min_age": {"$min": _numeric("age")},
+            "max_age": {"$max": _numeric("age")},
+            "min_bmi": {"$min": _numeric("bmi")},
+            "max_bmi": {"$max": _numeric("bmi")},
+            "genders": {"$addToSet": "$gender"},
+            "blood_groups": {"$addToSet": "$blood_group"},
+            "stages": {"$addToSet": "$stage"},
+        }},
+    ]
+    comorbidity_pipeline = [
+        {"$match": {"comorbidities.0": {"$exists": True}}},
+        {"$unwind": "$comorbidities"},
+        {"$group": {"_id": {"d": "$disease", "c": "$comorbidities"}, "n": {"$sum": 1}}},
+        {"$sort": {"n": -1, "_id.c": 1}},
+        {"$group": {"_id": "$_id.d", "top": {"$push": "$_id.c"}}},
+        {"$project": {"top": {"$slice": ["$top", 5]}}},
+    ]
+    stats, comorbidities = await asyncio.gather(
+        db.patients.aggregate(stats_pipeline).to_list(length=None),
+        db.patients.aggregate(comorbidity_pipeline).to_list(length=None),
+    )
+    top_by_disease = {doc["_id"]: doc["top"] for doc in comorbidities}
+    result = {}
+    for doc in stats:
+        disease = doc.pop("_id")
+        if disease:
+            doc["top_comorbidities"] = top_by_disease.get(disease, [])
+            result[disease] = doc
+    return result
+
+
+async def get_patients_for_disease(disease: str, projection: dict = None) -> List[dict]:
+    """Return patients with a specific disease (optionally projected)."""
+    db = get_async_db()
+    cursor = db.patients.find({"disease": disease}, projection or {"_id": 0}).batch_size(_STREAM_BATCH_SIZE)
     return await cursor.to_list(length=None)
 
 
+def build_eligibility_filter(trial_params: dict) -> dict:
+    """Translate trial eligibility params into a MongoDB query filter.
+
+    Mirrors the API's in-memory check: a patient with a missing or empty
+    value for a criterion is not excluded by that criterion. A stored age or
+    BMI that is not a number fails its range, since $gte/$lte only match
+    numbers.
+    """
+    clauses = []
+    for field, key in (("age", "ageRange"), ("bmi", "bmiRange")):
+        if trial_params.get(key):
+            lo, hi = trial_params[key]
+            clauses.append({"$or": [{field: None}, {field: {"$gte": lo, "$lte": hi}}]})
+    for field, key in (("gender", "genders"), ("blood_group", "bloodGroups"), ("stage", "stages")):
+        allowed = trial_params.get(key)
+        if allowed:
+            clauses.append({field: {"$in": list(allowed) + ["", None]}})
+    return {"$and": clauses} if clauses else {}
+
+
+# Fields covered by the eligibility screen's hospital-scoped search
+_SCREEN_SEARCH_FIELDS = (
+    "patient_id", "patient_name", "name", "disease", "stage",
+    "blood_group", "gender", "comorbidities",
+)
+_SCREEN_SEARCH_NUMERIC_FIELDS = ("age", "bmi")
+_STAGE_SEARCH_TERMS = frozenset({"I", "II", "III", "IV", "V"})
+
+
+def build_screen_search_filter(search_term: str) -> dict:
+    """Translate an eligibility-screen search term into a MongoDB filter.
+
+    A bare stage ("iii", "stage iii") matches that stage exactly; anything
+    else is a case-insensitive substring match over the screen fields,
+    including comorbidity entries and the stringified age/BMI.
+    """
+    stage = search_term.strip().upper()
+    if stage.startswith("STAGE "):
+        stage = stage.replace("STAGE ", "", 1).strip()
+    if stage in _STAGE_SEARCH_TERMS:
+        return {"stage": re.compile(rf"^\s*(stage\s+)?{stage}\s*$", re.IGNORECASE)}
+
+    pattern = re.escape(search_term)
+    regex = re.compile(pattern, re.IGNORECASE)
+    clauses: List[dict] = [{field: regex} for field in _SCREEN_SEARCH_FIELDS]
+    clauses += [
+        {"$expr": {"$regexMatch": {
+            "input": {"$ifNull": [{"$toString": f"${field}"}, ""]},
+            "regex": pattern, "options": "i",
+        }}}
+        for field in _SCREEN_SEARCH_NUMERIC_FIELDS
+    ]
+    return {"$or": clauses}
+
+
+async def get_eligibility_screen(
+    eligibility_filter: dict,
+    page_filter: dict,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    projection: Optional[dict] = None,
+) -> Dict[str, Any]:
+    """Screen patients against a trial in a single $facet aggregation.
+
+    Returns per-hospital totals and eligible counts over the whole
+    collection, plus the patients matching *page_filter* (``skip``/``limit``
+    applied in the database; all matches when *limit* is None), shaped by
+    *projection* (defaults to the eligibility fields).
+    """
+    db = get_async_db()
+    page_pipeline: List[dict] = [{"$match": page_filter}]
+    if skip:
+        page_pipeline.append({"$skip": skip})
+    if limit is not None:
+        page_pipeline.append({"$limit": limit})
+    page_pipeline.append({"$project": projection or _ELIGIBILITY_PROJECTION})
+
+    pipeline = [{"$facet": {
+        "totals": [{"$group": {"_id": "$hospital_name", "n": {"$sum": 1}}}],
+        "eligible": [
+            {"$match": eligibility_filter},
+            {"$group": {"_id": "$hospital_name", "n": {"$sum": 1}}},
+        ],
+        "page_total": [{"$match": page_filter}, {"$count": "n"}],
+        "page": page_pipeline,
+    }}]
+    result = {"totals": [], "eligible": [], "page_total": [], "page": []}
+    async for doc in db.patients.aggregate(pipeline):
+        result = doc
+
+    eligible_counts = {(d["_id"] or "Unknown"): d["n"] for d in result["eligible"]}
+    hospital_breakdown: Dict[str, Dict[str, int]] = {}
+    for d in result["totals"]:
+        name = d["_id"] or "Unknown"
+        eligible = eligible_counts.get(name, 0)
+        hospital_breakdown[name] = {
+            "eligible": eligible,
+            "not_eligible": d["n"] - eligible,
+            "total": d["n"],
+        }
+    return {
+        "hospital_breakdown": hospital_breakdown,
+        "page_total": result["page_total"][0]["n"] if result["page_total"] else 0,
+        "patients": result["page"],
+    }
+
+
+# Bulk upload: documents per insert_many call, and calls in flight at once
+_INSERT_CHUNK_SIZE = 1000
+_INSERT_CONCURRENCY = 4
+
+
 async def insert_patients(patients: List[dict], hospital_name: str = None) -> int:
     """Insert new patient records. If *hospital_name* is given, each record is
-    tagged with that hospital so it can be scoped to the uploading account."""
+    tagged with that hospital so it can be scoped to the uploading account.
+
+    Records whose (hospital_name, patient_id) already exist are skipped;
+    returns the number actually inserted."""
     if not patients:
         return 0
     db = get_async_db()
@@ -491,8 +811,52 @@ async def insert_patients(patients: List[dict], hospital_name: str = None) -> in
         p.pop("_id", None)
         if hospital_name:
             p["hospital_name"] = hospital_name
-    result = await db.patients.insert_many(patients, ordered=False)
-    return len(result.inserted_ids)
+
+    # Upload progress is tracked by the API, so skip waiting on the journal
+    collection = db.patients.with_options(write_concern=WriteConcern(w=1, j=False))
+    sem = asyncio.Semaphore(_INSERT_CONCURRENCY)
+
+    disease_counts: Counter = Counter()
+
+    async def _insert_chunk(chunk: List[dict]) -> int:
+        async with sem:
+            # Skip records the same hospital already has (e.g. a re-uploaded file)
+            ids = [p["patient_id"] for p in chunk if p.get("patient_id")]
+            if ids:
+                existing = {
+                    (d.get("hospital_name"), d["patient_id"])
+                    async for d in db.patients.find(
+                        {"patient_id": {"$in": ids}}, {"_id": 0, "patient_id": 1, "hospital_name": 1},
+                    )
+                }
+                if existing:
+                    chunk = [p for p in chunk if (p.get("hospital_name"), p.get("patient_id")) not in existing]
+                    if not chunk:
+                        return 0
+            try:
+                result = await collection.insert_many(chunk, ordered=False, bypass_document_validation=True)
+                inserted = chunk
+                n = len(result.inserted_ids)
+            except BulkWriteError as bwe:
+                failed = {err.get("index") for err in bwe.details.get("writeErrors", [])}
+                inserted = [p for i, p in enumerate(chunk) if i not in failed]
+                n = bwe.details.get("nInserted", 0)
+            disease_counts.update(p.get("disease") for p in inserted if p.get("disease"))
+            return n
+
+    chunks = [patients[i:i + _INSERT_CHUNK_SIZE] for i in range(0, len(patients), _INSERT_CHUNK_SIZE)]
+    counts = await asyncio.gather(*(_insert_chunk(c) for c in chunks))
+
+    # Keep the per-disease totals read by get_disease_counts current
+    if disease_counts:
+        try:
+            await db.disease_counts.bulk_write([
+                UpdateOne({"_id": d}, {"$inc": {"count": c}}, upsert=True)
+                for d, c in disease_counts.items()
+            ], ordered=False)
+        except Exception as e:
+            logger.warning(f"Could not update disease counts: {e}")
+    return sum(counts)
 
 
 async def get_patient_stats(hospital_name: str = None) -> Dict[str, Any]:
@@ -537,19 +901,87 @@ async def get_hospital_patient_counts() -> Dict[str, int]:
 # Audit log helpers
 # ---------------------------------------------------------------------------
 
+# Single audit entries are buffered and written by a background thread with
+# insert_many — at most _AUDIT_BATCH_SIZE entries or _AUDIT_FLUSH_INTERVAL
+# seconds per write — instead of one insert_one round-trip per event.
+_AUDIT_BATCH_SIZE = 50
+_AUDIT_FLUSH_INTERVAL = 0.2  # seconds
+_audit_buffer: "queue.Queue[dict]" = queue.Queue()
+_audit_writer: Optional[threading.Thread] = None
+_audit_writer_start_lock = threading.Lock()
+_audit_write_lock = threading.Lock()  # held while a batch is being written
+
+
+def _write_audit_entries(batch: List[dict]) -> None:
+    with _audit_write_lock:
+        try:
+            insert_audit_logs_sync(batch)
+        except Exception as e:
+            logger.warning(f"Could not write {len(batch)} audit logs: {e}")
+
+
+def _audit_writer_loop() -> None:
+    while True:
+        batch = [_audit_buffer.get()]
+        deadline = time.monotonic() + _AUDIT_FLUSH_INTERVAL
+        while len(batch) < _AUDIT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_audit_buffer.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _write_audit_entries(batch)
+
+
+def _enqueue_audit_entry(entry: dict) -> None:
+    global _audit_writer
+    if _audit_writer is None:
+        with _audit_writer_start_lock:
+            if _audit_writer is None:
+                _audit_writer = threading.Thread(
+                    target=_audit_writer_loop, name="audit-log-writer", daemon=True
+                )
+                _audit_writer.start()
+    _audit_buffer.put_nowait({k: v for k, v in entry.items() if k != "_id"})
+
+
+def flush_audit_logs() -> None:
+    """Write any buffered audit entries now (call on shutdown)."""
+    pending = []
+    while True:
+        try:
+            pending.append(_audit_buffer.get_nowait())
+        except queue.Empty:
+            break
+    for start in range(0, len(pending), _AUDIT_BATCH_SIZE):
+        _write_audit_entries(pending[start:start + _AUDIT_BATCH_SIZE])
+    # Wait for a batch the writer thread may already be inserting
+    with _audit_write_lock:
+        pass
+
+
+atexit.register(flush_audit_logs)
+
+
 async def insert_audit_log(entry: dict):
-    """Insert a single audit log entry."""
-    db = get_async_db()
-    entry.pop("_id", None)
-    await db.audit_logs.insert_one(entry)
+    """Queue a single audit log entry for the batched background writer."""
+    _enqueue_audit_entry(entry)
 
 
 def insert_audit_log_sync(entry: dict):
-    """Insert a single audit log entry (synchronous — for blockchain logger)."""
+    """Queue a single audit log entry (synchronous — for blockchain logger)."""
+    _enqueue_audit_entry(entry)
+
+
+def insert_audit_logs_sync(entries: List[dict]):
+    """Insert many audit log entries in one round-trip (synchronous)."""
+    if not entries:
+        return
     db = get_sync_db()
-    entry_copy = dict(entry)
-    entry_copy.pop("_id", None)
-    db.audit_logs.insert_one(entry_copy)
+    docs = [{k: v for k, v in e.items() if k != "_id"} for e in entries]
+    db.audit_logs.insert_many(docs, ordered=False)
 
 
 async def get_audit_logs(limit: int = 500) -> List[dict]:
@@ -583,6 +1015,26 @@ def insert_training_log_sync(entry: dict):
     db.training_logs.insert_one(entry_copy)
 
 
+def insert_training_logs_bulk_sync(entries: List[dict]) -> int:
+    """Insert many training round logs in one round-trip (synchronous)."""
+    if not entries:
+        return 0
+    db = get_sync_db()
+    docs = [{k: v for k, v in e.items() if k != "_id"} for e in entries]
+    result = db.training_logs.insert_many(docs, ordered=False, bypass_document_validation=True)
+    return len(result.inserted_ids)
+
+
+async def insert_training_logs_bulk(entries: List[dict]) -> int:
+    """Insert many training round logs in one round-trip."""
+    if not entries:
+        return 0
+    db = get_async_db()
+    docs = [{k: v for k, v in e.items() if k != "_id"} for e in entries]
+    result = await db.training_logs.insert_many(docs, ordered=False, bypass_document_validation=True)
+    return len(result.inserted_ids)
+
+
 async def get_training_logs() -> List[dict]:
     """Return all training logs ordered by round."""
     db = get_async_db()
@@ -19,7 +19,7 @@ Collections:
 import os
 import logging
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 
 import certifi
 import dotenv
@@ -27,6 +27,8 @@ from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient, ASCENDING, DESCENDING
 
+from database import MONGO_CLIENT_OPTIONS
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
@@ -47,28 +49,36 @@ logger.setLevel(logging.INFO)
 # ---------------------------------------------------------------------------
 _async_client: Optional[AsyncIOMotorClient] = None
 _sync_client: Optional[MongoClient] = None
+_async_db = None
+_sync_db = None
 
 
 def get_async_client() -> AsyncIOMotorClient:
     global _async_client
     if _async_client is None:
-        _async_client = AsyncIOMotorClient(MONGO_URI, tlsCAFile=certifi.where())
+        _async_client = AsyncIOMotorClient(MONGO_URI, tlsCAFile=certifi.where(), **MONGO_CLIENT_OPTIONS)
     return _async_client
 
 
 def get_sync_client() -> MongoClient:
     global _sync_client
     if _sync_client is None:
-        _sync_client = MongoClient(MONGO_URI, tlsCAFile=certifi.where())
+        _sync_client = MongoClient(MONGO_URI, tlsCAFile=certifi.where(), **MONGO_CLIENT_OPTIONS)
     return _sync_client
 
 
 def get_async_db():
-    return get_async_client()[DB_NAME]
+    global _async_db
+    if _async_db is None:
+        _async_db = get_async_client()[DB_NAME]
+    return _async_db
 
 
 def get_sync_db():
-    return get_sync_client()[DB_NAME]
+    global _sync_db
+    if _sync_db is None:
+        _sync_db = get_sync_client()[DB_NAME]
+    return _sync_db
 
 
 # ---------------------------------------------------------------------------
@@ -428,6 +438,48 @@ def _build_mongo_eligibility_filter(criteria: dict) -> dict:
     return mongo_filter
 
 
+def make_eligibility_predicate(criteria: dict) -> Callable[[dict], bool]:
+    """Python counterpart of _build_mongo_eligibility_filter.
+
+    Criteria are unpacked once into closure locals so the returned
+    predicate does no dict lookups on *criteria* per patient. Missing or
+    empty patient fields pass, matching the previous per-patient checks.
+    """
+    age_range = criteria.get("ageRange")
+    bmi_range = criteria.get("bmiRange")
+    age_lo, age_hi = age_range if age_range else (None, None)
+    bmi_lo, bmi_hi = bmi_range if bmi_range else (None, None)
+    genders = frozenset(criteria.get("genders") or ())
+    blood_groups = frozenset(criteria.get("bloodGroups") or ())
+    stages = frozenset(criteria.get("stages") or ())
+
+    def is_eligible(patient: dict) -> bool:
+        get = patient.get
+        if age_range:
+            age = get("age")
+            if age is not None and not (age_lo <= age <= age_hi):
+                return False
+        if genders:
+            gender = get("gender")
+            if gender and gender not in genders:
+                return False
+        if blood_groups:
+            bg = get("blood_group")
+            if bg and bg not in blood_groups:
+                return False
+        if bmi_range:
+            bmi = get("bmi")
+            if bmi is not None and not (bmi_lo <= bmi <= bmi_hi):
+                return False
+        if stages:
+            stage = get("stage")
+            if stage and stage not in stages:
+                return False
+        return True
+
+    return is_eligible
+
+
 async def get_global_eligibility_summary(
     disease: str, criteria: dict
 ) -> Dict[str, Any]:
@@ -447,24 +499,27 @@ async def get_global_eligibility_summary(
 
     elig_filter = _build_mongo_eligibility_filter(criteria)
 
-    # Total counts per hospital (all patients with matching disease)
-    total_pipeline = [
+    # Total and eligible counts per hospital from one scan of the disease
+    # match — $facet feeds the same documents to both groupings
+    pipeline = [
         {"$match": disease_match},
-        {"$group": {"_id": "$hospital_name", "total": {"$sum": 1}}},
+        {"$facet": {
+            "totals": [
+                {"$group": {"_id": "$hospital_name", "total": {"$sum": 1}}},
+            ],
+            "eligible": [
+                {"$match": elig_filter},
+                {"$group": {"_id": "$hospital_name", "eligible": {"$sum": 1}}},
+            ],
+        }},
     ]
     total_counts: Dict[str, int] = {}
-    async for doc in db.patients.aggregate(total_pipeline):
-        total_counts[doc["_id"] or "Unknown"] = doc["total"]
-
-    # Eligible counts per hospital (disease match + criteria match)
-    eligible_match = {**disease_match, **elig_filter}
-    eligible_pipeline = [
-        {"$match": eligible_match},
-        {"$group": {"_id": "$hospital_name", "eligible": {"$sum": 1}}},
-    ]
     eligible_counts: Dict[str, int] = {}
-    async for doc in db.patients.aggregate(eligible_pipeline):
-        eligible_counts[doc["_id"] or "Unknown"] = doc["eligible"]
+    async for doc in db.patients.aggregate(pipeline):
+        for row in doc["totals"]:
+            total_counts[row["_id"] or "Unknown"] = row["total"]
+        for row in doc["eligible"]:
+            eligible_counts[row["_id"] or "Unknown"] = row["eligible"]
 
     breakdown: Dict[str, Dict[str, int]] = {}
     total_eligible = 0
@@ -569,7 +624,7 @@ async def get_hospital_patients_paginated(
         # Re-count after search
         tab_total = await db.patients.count_documents(query)
 
-    total_pages = max(1, -(-tab_total // page_size))
+    total_pages = max(1, (tab_total + page_size - 1) // page_size)
     skip = (page - 1) * page_size
 
     cursor = db.patients.find(query, full_projection).sort("patient_id", 1).skip(skip).limit(page_size)
@@ -613,28 +668,7 @@ async def check_patient_eligibility(patient_id_or_oid: str, criteria: dict) -> O
     doc["_oid"] = str(doc.pop("_id"))
 
     # Evaluate eligibility
-    elig_filter = _build_mongo_eligibility_filter(criteria)
-    is_eligible = True
-    age = doc.get("age")
-    if age is not None and criteria.get("ageRange"):
-        lo, hi = criteria["ageRange"]
-        if not (lo <= age <= hi):
-            is_eligible = False
-    gender = doc.get("gender", "")
-    if criteria.get("genders") and gender and gender not in criteria["genders"]:
-        is_eligible = False
-    bg = doc.get("blood_group", "")
-    if criteria.get("bloodGroups") and bg and bg not in criteria["bloodGroups"]:
-        is_eligible = False
-    bmi = doc.get("bmi")
-    if bmi is not None and criteria.get("bmiRange"):
-        lo, hi = criteria["bmiRange"]
-        if not (lo <= bmi <= hi):
-            is_eligible = False
-    stage = doc.get("stage", "")
-    if criteria.get("stages") and stage and stage not in criteria["stages"]:
-        is_eligible = False
-
+    is_eligible = make_eligibility_predicate(criteria)(doc)
     doc["is_eligible"] = is_eligible
     return doc
 
@@ -5,7 +5,7 @@ from datetime import datetime
 import hashlib
 import json
 from model import create_model
-from data_utils import load_and_preprocess_data
+from data_utils import get_preprocessed
 from blockchain.logger import get_safe_blockchain_logger
 
 class FederatedServer:
@@ -24,8 +24,9 @@ class FederatedServer:
         Evaluate global model parameters using an evaluation function.
         This function is called after each round.
         """
-        # Load test data
-        _, X_test, _, y_test, _ = load_and_preprocess_data()
+        # Test data is loaded and scaled once, not on every round
+        data = get_preprocessed()
+        X_test, y_test = data["X_test"], data["y_test"]
 
         # Ensure arrays are numpy arrays for shape access and model evaluation
         X_test = np.asarray(X_test)
@@ -50,7 +50,7 @@ export default function PatientsManager({ user }) {
   const [trainingMsg, setTrainingMsg] = useState(null);
   const [preprocessInfo, setPreprocessInfo] = useState(null);
   const [uploadProgress, setUploadProgress] = useState(null);
-  const progressTimerRef = useRef(null);
+  const progressSourceRef = useRef(null);
   const searchTimerRef = useRef(null);
 
   const hospitalName = user?.hospital_name || '';
@@ -62,7 +62,7 @@ export default function PatientsManager({ user }) {
   }, [searchTerm]);
 
   useEffect(() => { loadPatients(); }, [hospitalName, page, debouncedSearch, sortField, sortDir]);
-  useEffect(() => () => { if (progressTimerRef.current) clearInterval(progressTimerRef.current); }, []);
+  useEffect(() => () => { if (progressSourceRef.current) progressSourceRef.current.close(); }, []);
 
   const loadPatients = async () => {
     try {
@@ -79,25 +79,27 @@ export default function PatientsManager({ user }) {
 
   const handleFileSelect = (e) => { const file = e.target.files[0]; if (file) { setUploadedFile(file); setUploadStatus(null); setPreprocessInfo(null); } };
 
-  const startProgressPolling = useCallback((uploadId) => {
-    if (progressTimerRef.current) clearInterval(progressTimerRef.current);
-    setUploadProgress({ percent: 5, stage: 'Starting upload...' });
-    progressTimerRef.current = setInterval(async () => {
-      try { const prog = await apiService.getUploadProgress(uploadId); setUploadProgress(prog); if (prog.percent >= 100 || prog.percent < 0) { clearInterval(progressTimerRef.current); progressTimerRef.current = null; } } catch { /* ignore */ }
-    }, 400);
+  const stopProgressStream = useCallback(() => {
+    if (progressSourceRef.current) { progressSourceRef.current.close(); progressSourceRef.current = null; }
   }, []);
 
+  // Follow server-side preprocessing stages; the first 10% is the file transfer
+  const startProgressStream = useCallback((uploadId) => {
+    stopProgressStream();
+    progressSourceRef.current = apiService.streamUploadProgress(uploadId, (prog) => {
+      if (prog.percent > 10 && prog.percent < 100) setUploadProgress(prog);
+    });
+  }, [stopProgressStream]);
+
   const handleUpload = async () => {
     if (!uploadedFile) { setUploadStatus({ type: 'error', message: 'Please select a file' }); return; }
     try {
       setLoading(true); setPreprocessInfo(null); setUploadProgress({ percent: 2, stage: 'Sending file to server...' });
       const onUploadProgress = (evt) => { if (evt.total) { const pct = Math.min(Math.round((evt.loaded / evt.total) * 10), 10); setUploadProgress({ percent: pct, stage: 'Uploading file...' }); } };
-      const resultPromise = apiService.uploadFile(uploadedFile, hospitalName, onUploadProgress);
-      let simPercent = 10;
-      const stages = ['Parsing file...','Detecting columns...','Normalising data...','Generating patient IDs...','Saving standard CSV...','Merging into store...','Persisting JSON...','Generating training CSV...','Logging to blockchain...'];
-      const simTimer = setInterval(() => { if (simPercent < 90) { simPercent += Math.random() * 12 + 3; if (simPercent > 90) simPercent = 90; const stageIdx = Math.min(Math.floor((simPercent - 10) / 10), stages.length - 1); setUploadProgress({ percent: Math.round(simPercent), stage: stages[stageIdx] }); } }, 600);
-      const result = await resultPromise;
-      clearInterval(simTimer);
+      const uploadId = apiService.newUploadId();
+      startProgressStream(uploadId);
+      const result = await apiService.uploadFile(uploadedFile, hospitalName, onUploadProgress, uploadId);
+      stopProgressStream();
       setUploadProgress({ percent: 100, stage: 'Complete!' });
       setUploadStatus({ type: 'success', message: result.message });
       setPreprocessInfo({ fileType: (result.file_type || '').toUpperCase(), newPatients: result.new_patients || 0, hospitals: result.hospitals_in_file || [], totalPatients: result.total_patients || 0 });
@@ -106,7 +108,7 @@ export default function PatientsManager({ user }) {
       try { setTrainingMsg({ type: 'info', message: 'Preprocessing complete. Starting federated model training...' }); await apiService.startTraining({ num_rounds: 10 }); setTrainingMsg({ type: 'success', message: 'Model training started automatically.' }); setTimeout(() => setTrainingMsg(null), 6000); } catch (trainErr) { const msg = trainErr?.response?.data?.detail || 'Training could not be started'; setTrainingMsg({ type: 'warning', message: msg }); setTimeout(() => setTrainingMsg(null), 4000); }
       setTimeout(() => { setShowUploadForm(false); setPreprocessInfo(null); setUploadProgress(null); }, 5000);
     } catch (error) {
-      if (progressTimerRef.current) clearInterval(progressTimerRef.current);
+      stopProgressStream();
       setUploadProgress(null);
       setUploadStatus({ type: 'error', message: error?.response?.data?.detail || error.message });
     } finally { setLoading(false); }
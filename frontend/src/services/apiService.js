@@ -232,14 +232,17 @@ export const apiService = {
     }
   },
 
-  // Unified upload (CSV, JSON, PDF) — preprocessed on backend
-  // Returns { data, uploadId } so caller can poll progress
-  uploadFile: async (file, hospital, onUploadProgress) => {
+  // Unified upload (CSV, JSON, PDF) — preprocessed on backend.
+  // Pass an uploadId (see newUploadId) to follow progress via streamUploadProgress
+  uploadFile: async (file, hospital, onUploadProgress, uploadId) => {
     try {
       const formData = new FormData();
       formData.append('file', file);
       if (hospital) formData.append('hospital', hospital);
-      const params = hospital ? `?hospital=${encodeURIComponent(hospital)}` : '';
+      const query = new URLSearchParams();
+      if (hospital) query.set('hospital', hospital);
+      if (uploadId) query.set('upload_id', uploadId);
+      const params = query.toString() ? `?${query}` : '';
       const response = await axios.post(`${API_BASE_URL}/upload${params}`, formData, {
         headers: { 'Content-Type': 'multipart/form-data' },
         onUploadProgress: onUploadProgress || undefined,
@@ -251,66 +254,27 @@ export const apiService = {
     }
   },
 
-  // Poll preprocessing progress by upload_id
-  getUploadProgress: async (uploadId) => {
-    try {
-      const response = await axios.get(`${API_BASE_URL}/upload-progress/${uploadId}`);
-      return response.data;
-    } catch (error) {
-      return { percent: 0, stage: 'waiting' };
-    }
-  },
+  // Upload id in the format the backend accepts (32 lowercase hex chars)
+  newUploadId: () => crypto.randomUUID().replace(/-/g, ''),
 
-  // Upload JSON file
-  uploadJson: async (file) => {
-    try {
-      const formData = new FormData();
-      formData.append('file', file);
-      const response = await axios.post(`${API_BASE_URL}/upload-json`, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
-      });
-      return response.data;
-    } catch (error) {
-      console.error('Error uploading JSON:', error);
-      throw error;
-    }
+  // Server-Sent Events feed of preprocessing progress; calls onProgress with
+  // { percent, stage } per stage change. Returns the EventSource (call .close())
+  streamUploadProgress: (uploadId, onProgress) => {
+    const source = new EventSource(`${API_BASE_URL}/upload-progress/${uploadId}/stream`);
+    source.onmessage = (evt) => {
+      const prog = JSON.parse(evt.data);
+      onProgress(prog);
+      if (prog.percent >= 100 || prog.percent < 0) source.close();
+    };
+    source.onerror = () => source.close();
+    return source;
   },
 
-  // Upload PDF file
-  uploadPdf: async (file) => {
-    try {
-      const formData = new FormData();
-      formData.append('file', file);
-      const response = await axios.post(`${API_BASE_URL}/upload-pdf`, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
-      });
-      return response.data;
-    } catch (error) {
-      console.error('Error uploading PDF:', error);
-      throw error;
-    }
-  },
-
-  // Upload CSV file
-  uploadCsv: async (file) => {
-    try {
-      const formData = new FormData();
-      formData.append('file', file);
-      const response = await axios.post(`${API_BASE_URL}/upload-csv`, formData, {
-        headers: {
-          'Content-Type': 'multipart/form-data',
-        },
-      });
-      return response.data;
-    } catch (error) {
-      console.error('Error uploading CSV:', error);
-      throw error;
-    }
-  },
+  // Type-specific helpers — the backend has a single /upload route that
+  // detects the format from the file extension
+  uploadJson: (file) => apiService.uploadFile(file),
+  uploadPdf: (file) => apiService.uploadFile(file),
+  uploadCsv: (file) => apiService.uploadFile(file),
 
   // Get blockchain logs from backend
   getBlockchainLogs: async () => {
@@ -25,12 +25,19 @@ import json
 import uuid
 import hashlib
 from datetime import datetime
-from typing import Tuple, Dict, Any, Optional, List
+from typing import Tuple, Dict, Any, Optional, List, Union, BinaryIO
 
 import pandas as pd
 import numpy as np
 
-# Optional PDF support
+# Optional PDF support — pypdfium2 (PDFium bindings) is preferred for speed,
+# PyPDF2 (pure Python) is the fallback
+try:
+    import pypdfium2 as pdfium
+    PYPDFIUM2_AVAILABLE = True
+except ImportError:
+    PYPDFIUM2_AVAILABLE = False
+
 try:
     import PyPDF2
     PYPDF2_AVAILABLE = True
@@ -89,16 +96,28 @@ BLOOD_GROUPS = ["A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-"]
 
 # ========================== PARSERS ======================================
 
-def parse_csv(content: bytes, filename: str = "") -> pd.DataFrame:
-    """Parse CSV bytes into a DataFrame."""
+FileContent = Union[bytes, BinaryIO]
+
+
+def _as_stream(content: FileContent) -> BinaryIO:
+    """Wrap raw bytes in a BytesIO; pass file-like objects through unchanged."""
+    if isinstance(content, (bytes, bytearray)):
+        return io.BytesIO(content)
+    return content
+
+
+def parse_csv(content: FileContent, filename: str = "") -> pd.DataFrame:
+    """Parse CSV bytes or a binary file object into a DataFrame."""
+    stream = _as_stream(content)
     try:
-        df = pd.read_csv(io.BytesIO(content))
+        df = pd.read_csv(stream)
     except Exception:
         # Try different encodings / delimiters
         for enc in ("utf-8", "latin-1", "cp1252"):
             for sep in (",", ";", "\t", "|"):
                 try:
-                    df = pd.read_csv(io.BytesIO(content), encoding=enc, sep=sep)
+                    stream.seek(0)
+                    df = pd.read_csv(stream, encoding=enc, sep=sep)
                     if len(df.columns) > 1:
                         return df
                 except Exception:
@@ -107,14 +126,14 @@ def parse_csv(content: bytes, filename: str = "") -> pd.DataFrame:
     return df
 
 
-def parse_json_file(content: bytes) -> pd.DataFrame:
+def parse_json_file(content: FileContent) -> pd.DataFrame:
     """Parse a JSON file into a DataFrame.
     Handles both:
       - {"hospitals": {"Name": [records]}}  (our app format)
       - [records]                           (flat list)
       - {"patients": [records]}
     """
-    data = json.loads(content)
+    data = json.load(_as_stream(content))
 
     if isinstance(data, list):
         return pd.DataFrame(data)
@@ -137,18 +156,33 @@ def parse_json_file(content: bytes) -> pd.DataFrame:
     raise ValueError("Unrecognised JSON structure.")
 
 
-def parse_pdf(content: bytes) -> pd.DataFrame:
-    """Extract tabular patient data from a PDF.
-    Uses PyPDF2 to extract text, then tries to parse CSV-like lines.
-    """
-    if not PYPDF2_AVAILABLE:
-        raise ValueError("PDF support requires PyPDF2. Install it with: pip install PyPDF2")
-
-    reader = PyPDF2.PdfReader(io.BytesIO(content))
+def _pdf_text_lines(content: FileContent) -> List[str]:
+    """Text lines of every page, via pypdfium2 when installed, else PyPDF2."""
     text_lines = []
+    if PYPDFIUM2_AVAILABLE:
+        pdf = pdfium.PdfDocument(_as_stream(content))
+        try:
+            for page in pdf:
+                text_lines.extend(page.get_textpage().get_text_range().splitlines())
+        finally:
+            pdf.close()
+        return text_lines
+
+    reader = PyPDF2.PdfReader(_as_stream(content))
     for page in reader.pages:
         page_text = page.extract_text() or ""
         text_lines.extend(page_text.splitlines())
+    return text_lines
+
+
+def parse_pdf(content: FileContent) -> pd.DataFrame:
+    """Extract tabular patient data from a PDF.
+    Uses pypdfium2 (or PyPDF2) to extract text, then tries to parse CSV-like lines.
+    """
+    if not (PYPDFIUM2_AVAILABLE or PYPDF2_AVAILABLE):
+        raise ValueError("PDF support requires pypdfium2 or PyPDF2. Install it with: pip install pypdfium2")
+
+    text_lines = _pdf_text_lines(content)
 
     if not text_lines:
         raise ValueError("Could not extract any text from the PDF.")
@@ -322,7 +356,7 @@ def normalise(df: pd.DataFrame, default_hospital: str = "Unknown Hospital") -> p
 # ========================== PIPELINE =====================================
 
 def preprocess_upload(
-    content: bytes,
+    content: FileContent,
     filename: str,
     default_hospital: str = "Unknown Hospital"
 ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
@@ -330,7 +364,8 @@ def preprocess_upload(
     Full preprocessing pipeline.
 
     Args:
-        content: Raw bytes of the uploaded file.
+        content: Raw bytes of the uploaded file, or a seekable binary file
+            object (e.g. UploadFile.file) which is parsed without copying.
         filename: Original filename (used to detect type).
         default_hospital: Hospital name to assign when not present in data.
 
@@ -0,0 +1,47 @@
+"""Non-numeric ages/BMIs are screened the same way by /trials and the Mongo filter."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+from api import main
+
+PARAMS = {"ageRange": [18, 65], "bmiRange": [18.0, 30.0], "genders": ["Female"]}
+
+# (patient, eligible)
+CASES = [
+    ({"patient_id": "num", "age": 40, "bmi": 22.5, "gender": "Female"}, True),
+    ({"patient_id": "out_of_range", "age": 70, "bmi": 22.5, "gender": "Female"}, False),
+    ({"patient_id": "missing", "gender": "Female"}, True),
+    ({"patient_id": "none", "age": None, "bmi": None, "gender": ""}, True),
+    ({"patient_id": "empty_age", "age": "", "bmi": 22.5, "gender": "Female"}, False),
+    ({"patient_id": "text_bmi", "age": 40, "bmi": "abc", "gender": "Female"}, False),
+    ({"patient_id": "numeric_string", "age": "40", "bmi": 22.5, "gender": "Female"}, False),
+]
+
+
+def _expected():
+    return [p["patient_id"] for p, ok in CASES if ok]
+
+
+def test_estimate_excludes_non_numeric_ranges():
+    patients = [p for p, _ in CASES]
+    mask = main._eligibility_mask(main._screen_arrays(patients), PARAMS)
+    assert [p["patient_id"] for p, ok in zip(patients, mask) if ok] == _expected()
+
+
+def test_estimate_rule_holds_for_numeric_columns():
+    patients = [{"age": 40}, {"age": 70}, {}]
+    mask = main._eligibility_mask(main._screen_arrays(patients), {"ageRange": [18, 65]})
+    assert mask.tolist() == [True, False, True]
+
+
+def test_mongo_filter_matches_estimate():
+    mongomock = pytest.importorskip("mongomock")
+    coll = mongomock.MongoClient().db.patients
+    coll.insert_many([dict(p) for p, _ in CASES])
+    found = coll.find(db.build_eligibility_filter(PARAMS), {"_id": 0, "patient_id": 1})
+    assert sorted(d["patient_id"] for d in found) == sorted(_expected())
@@ -0,0 +1,52 @@
+"""Patient search query construction (database._patient_search_clauses)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database as db
+
+PATIENTS = [
+    {"patient_id": "SP001", "patient_name": "Aarav Kumar", "email": "aarav.kumar@gmail.com",
+     "phone": "+91 98765 43210", "disease": "Breast Cancer", "blood_group": "O+"},
+    {"patient_id": "SP002", "patient_name": "Aarav Shah", "email": "aarav.shah@gmail.com",
+     "phone": "+91 91234 56789", "disease": "Lung Cancer", "blood_group": "O-"},
+    {"patient_id": "SP003", "patient_name": "Meera Kumar", "email": "meera@yahoo.com",
+     "phone": "+91 99887 76655", "disease": "Diabetes", "blood_group": "A+"},
+]
+
+
+def _regex_matches(search):
+    _, clause = db._patient_search_clauses(search)
+    return [
+        p["patient_id"] for p in PATIENTS
+        if any(regex.search(str(p.get(field, ""))) for cond in clause["$or"] for field, regex in cond.items())
+    ]
+
+
+def test_single_word_uses_quoted_text_search():
+    text_clause, _ = db._patient_search_clauses("Kumar")
+    assert text_clause == {"$text": {"$search": '"Kumar"'}}
+
+
+def test_multi_word_search_skips_text_and_matches_whole_phrase():
+    text_clause, _ = db._patient_search_clauses("Aarav Kumar")
+    assert text_clause is None
+    assert _regex_matches("Aarav Kumar") == ["SP001"]
+    assert _regex_matches("breast cancer") == ["SP001"]
+
+
+def test_email_search_skips_text_and_matches_one_patient():
+    text_clause, _ = db._patient_search_clauses("aarav.kumar@gmail.com")
+    assert text_clause is None
+    assert _regex_matches("aarav.kumar@gmail.com") == ["SP001"]
+
+
+def test_punctuated_terms_are_matched_literally():
+    assert db._patient_search_clauses("O+")[0] is None
+    assert _regex_matches("O+") == ["SP001"]
+    assert _regex_matches("98765 43210") == ["SP001"]
+
+
+def test_partial_id_falls_back_to_substring():
+    assert _regex_matches("SP00") == ["SP001", "SP002", "SP003"]